@@ -1,85 +1,250 @@
 '''Flask API for displaying data from the database.'''
 
 from os import environ as ENV
+from functools import wraps
 
 from dotenv import load_dotenv
 from psycopg2 import OperationalError
-from flask import Flask, jsonify, render_template, request
+from psycopg2.pool import PoolError
+from flask import Flask, Response, g, jsonify, make_response, render_template, request, url_for
 
-from queries import get_db_connection, get_table, get_case_by_case_no, get_judge_by_id, filter_judges, filter_cases_by_judge, search_cases
+from cache import DataVersion, ResponseCache, get_cache_key, make_cache_entry
+from db_pool import get_db_pool, release_db_connection
+from export import encode_csv, encode_ndjson, gzip_chunks
+from queries import (get_table, get_case_by_case_no, get_judge_by_id, search_cases,
+                     get_page, get_fields, get_page_size, validate_judge_filters, validate_judge_id,
+                     stream_table, get_cases_by_case_nos, get_judges_by_ids, get_stats,
+                     get_expansions, get_case_detail, get_next_page_args, get_search_offset,
+                     get_batch_ids, validate_case_nos, validate_judge_ids, get_batch_result,
+                     STATS_VIEWS)
+
+PAGE_ARGS = ['limit', 'after', 'fields']
+
+CACHE = ResponseCache(int(ENV.get("CACHE_MAXSIZE", 256)),
+                      float(ENV.get("CACHE_TTL", 300)))
+DATA_VERSION = DataVersion(float(ENV.get("CACHE_VERSION_INTERVAL", 5)))
 
 
 app = Flask(__name__)
 
 
+def get_conn():
+    """Checks out a pooled connection for the current request on first use.
+    It is returned to the pool when the app context ends."""
+
+    if 'conn' not in g:
+        g.conn = get_db_pool(ENV).getconn()
+
+    return g.conn
+
+
+@app.teardown_appcontext
+def release_conn(exception) -> None:
+    """Returns the request's connection to the pool, including on error paths."""
+
+    conn = g.pop('conn', None)
+
+    if conn is not None:
+        release_db_connection(conn)
+
+
+@app.errorhandler(OperationalError)
+@app.errorhandler(PoolError)
+def handle_connection_error(e) -> tuple:
+    """Returns an error if no database connection could be made."""
+
+    return jsonify({'error': 'Error while connecting to PostgreSQL. Please check your connection.'}), 503
+
+
+def cached(view):
+    """Caches a view's successful responses by url and query string until the data version changes.
+    Responses carry a strong ETag, and matching If-None-Match requests get a 304."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+
+        key = get_cache_key(request.base_url, request.args)
+        version = DATA_VERSION.get(get_conn)
+
+        entry = CACHE.get(key, version)
+
+        if entry is None:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            entry = make_cache_entry(response.get_data(), response.mimetype)
+            CACHE.set(key, version, entry)
+
+        body, mimetype, etag = entry
+        response = Response(body, mimetype=mimetype)
+        response.set_etag(etag)
+
+        return response.make_conditional(request)
+
+    return wrapper
+
+
+def get_next_link(rows: list, table: str, limit: int):
+    """Returns the url of the page after the given rows, or None on the last page."""
+
+    args = get_next_page_args(request.args.to_dict(), rows, table, limit)
+
+    return url_for(request.endpoint, _external=True, **args) if args else None
+
+
+def get_paginated(table: str, filters: dict = None) -> tuple[list, str]:
+    """Returns a page of a table using the limit, after and fields request args,
+    along with the link to the next page."""
+
+    args = request.args
+    limit = get_page_size(args.get('limit'))
+    columns = get_fields(table, args.get('fields'))
+
+    rows = get_page(get_conn(), table, columns, limit,
+                    args.get('after'), filters)
+
+    return rows, get_next_link(rows, table, limit)
+
+
+def get_search_results(search: str, filters: dict = None) -> tuple:
+    """Returns a page of ranked search results using the limit and page request args.
+    Filters are equality conditions on integer id columns of the cases."""
+
+    limit = get_page_size(request.args.get('limit'))
+    page = request.args.get('page', '1')
+
+    cases = search_cases(get_conn(), search, limit, get_search_offset(page, limit), filters)
+
+    if not cases:
+        return jsonify({'message': 'No cases found'}), 404
+
+    next_link = None
+    if len(cases) == limit:
+        args = request.args.to_dict()
+        args['page'] = int(page) + 1
+        next_link = url_for(request.endpoint, _external=True, **args)
+
+    return jsonify({'cases': cases, 'next': next_link}), 200
+
+
 @app.route('/')
 def home() -> str:
     """Render the home page."""
-    result = render_template('homepage.html')
-    print(type(result))
-    return result
+    return render_template('homepage.html')
 
 
 @app.route('/cases', methods=['GET'])
 def get_all_cases() -> tuple:
-    """API that returns all the cases."""
-
-    try:
-        conn = get_db_connection(ENV)
-
-    except OperationalError as e:
-        return jsonify({'error': 'Error while connecting to PostgreSQL. Please check your connection.'})
+    """API that returns the cases, a page at a time."""
 
     args = request.args.to_dict()
     judge = args.get('judge_id', None)
     search = args.get('search', None)
 
-    if judge:
-        cases = filter_cases_by_judge(conn, judge)
+    try:
+        filters = {}
+        if judge:
+            validate_judge_id(judge)
+            filters['judge_id'] = judge
 
-    elif search:
-        cases = search_cases(conn, search)
-    else:
-        cases = get_table(conn, 'transcript')
+        if search:
+            return get_search_results(search, filters)
+
+        cases, next_link = get_paginated('transcript', filters)
 
-    conn.close()
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'{e}'}), 400
 
-    if cases:
-        return jsonify({'cases': cases}), 200
+    if cases or 'after' in args:
+        return jsonify({'cases': cases, 'next': next_link}), 200
     else:
         return jsonify({'message': 'No cases found'}), 404
 
 
+@app.route('/cases/export', methods=['GET'])
+def export_cases() -> Response:
+    """API that streams every case as NDJSON (default) or CSV.
+    The response is gzip compressed if the client accepts it."""
+
+    export_format = request.args.get('format', 'ndjson')
+
+    if export_format not in ['ndjson', 'csv']:
+        return jsonify({'error': 'Format must be ndjson or csv.'}), 400
+
+    try:
+        columns = get_fields('transcript', request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': f'{e}'}), 400
+
+    # The connection outlives the request context while the response streams,
+    # so it is returned to the pool when the response is closed instead.
+    conn = get_db_pool(ENV).getconn()
+    rows = stream_table(conn, 'transcript', columns)
+
+    if export_format == 'csv':
+        chunks, mimetype = encode_csv(rows, columns), 'text/csv'
+    else:
+        chunks, mimetype = encode_ndjson(rows), 'application/x-ndjson'
+
+    compress = 'gzip' in request.headers.get('Accept-Encoding', '')
+    if compress:
+        chunks = gzip_chunks(chunks)
+
+    response = Response(chunks, mimetype=mimetype)
+    response.call_on_close(lambda: release_db_connection(conn))
+    response.headers['Content-Disposition'] = f'attachment; filename=cases.{export_format}'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+
+    return response
+
+
 @app.route('/cases/<case_no>', methods=['GET'])
 def get_case_by_case_number(case_no: str) -> tuple:
-    """API that returns information about a specific case."""
+    """API that returns information about a specific case.
+    The expand argument joins on its judge (with circuit and judge type)
+    and/or the judge's related cases, in the same query."""
 
     try:
-        conn = get_db_connection(ENV)
+        expansions = get_expansions(request.args.get('expand'))
+    except ValueError as e:
+        return jsonify({'error': f'{e}'}), 400
 
-    except OperationalError as e:
-        return jsonify({'error': 'Error while connecting to PostgreSQL. Please check your connection.'})
+    if expansions:
+        case = get_case_detail(get_conn(), case_no, expansions)
+    else:
+        case = get_case_by_case_no(get_conn(), case_no)
 
-    case = get_case_by_case_no(conn, case_no)
-    conn.close()
     if case:
         return jsonify({'case': case}), 200
     else:
         return jsonify({'message': f'Case with case number {case_no} not found'}), 404
 
 
+@app.route('/cases/batch', methods=['POST'])
+def get_cases_batch() -> tuple:
+    """API that returns the cases for a list of case numbers, keyed by case number."""
+
+    try:
+        case_nos = validate_case_nos(get_batch_ids(request.get_json(silent=True), 'case_nos'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'{e}'}), 400
+
+    cases, missing = get_batch_result(case_nos, get_cases_by_case_nos(get_conn(), case_nos))
+
+    return jsonify({'cases': cases, 'missing': missing}), 200
+
+
 @app.route('/circuits', methods=['GET'])
+@cached
 def get_all_circuits() -> tuple:
     """API that returns all the circuits."""
 
-    try:
-        conn = get_db_connection(ENV)
-
-    except OperationalError as e:
-        return jsonify({'error': 'Error while connecting to PostgreSQL. Please check your connection.'})
+    conn = get_conn()
 
     circuits = get_table(conn, 'circuit')
-    conn.close()
     if circuits:
         return jsonify({'circuits': circuits}), 200
     else:
@@ -87,29 +252,25 @@ def get_all_circuits() -> tuple:
 
 
 @app.route('/judges', methods=['GET'])
+@cached
 def get_all_judges() -> tuple:
-    """API that returns all the judges."""
-
-    try:
-        conn = get_db_connection(ENV)
-
-    except OperationalError as e:
-        return jsonify({'error': 'Error while connecting to PostgreSQL. Please check your connection.'})
+    """API that returns the judges, a page at a time."""
 
-    filters = request.args.to_dict()
+    filters = {key: value for key, value in request.args.to_dict().items()
+               if key not in PAGE_ARGS}
 
-    if filters:
-        try:
-            judge = filter_judges(conn, filters)
-        except Exception as e:
-            return jsonify({'error': f'{e}'}), 404
+    try:
+        validate_judge_filters(filters)
+    except Exception as e:
+        return jsonify({'error': f'{e}'}), 404
 
-    else:
-        judge = get_table(conn, 'judge')
-    conn.close()
+    try:
+        judge, next_link = get_paginated('judge', filters)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'{e}'}), 400
 
-    if judge:
-        return jsonify({'judges': judge}), 200
+    if judge or 'after' in request.args:
+        return jsonify({'judges': judge, 'next': next_link}), 200
     else:
         return jsonify({'message': 'No judges found'}), 404
 
@@ -118,11 +279,7 @@ def get_all_judges() -> tuple:
 def get_all_judges_by_id(judge_id: int) -> tuple:
     """API that returns all the judges by given id."""
 
-    try:
-        conn = get_db_connection(ENV)
-
-    except OperationalError as e:
-        return jsonify({'error': 'Error while connecting to PostgreSQL. Please check your connection.'})
+    conn = get_conn()
 
     try:
         judge = get_judge_by_id(conn, judge_id)
@@ -130,33 +287,61 @@ def get_all_judges_by_id(judge_id: int) -> tuple:
     except TypeError as e:
         return jsonify({'error': f'{e}'}), 404
 
-    conn.close()
     if judge:
         return jsonify({'judges': judge}), 200
     else:
         return jsonify({'message': f'Judge with judge_id {judge_id} not found'}), 404
 
 
+@app.route('/judges/batch', methods=['POST'])
+def get_judges_batch() -> tuple:
+    """API that returns the judges for a list of judge ids, keyed by judge id."""
+
+    try:
+        judge_ids = validate_judge_ids(get_batch_ids(request.get_json(silent=True), 'judge_ids'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'{e}'}), 400
+
+    judges, missing = get_batch_result(judge_ids, get_judges_by_ids(get_conn(), judge_ids))
+
+    return jsonify({'judges': judges, 'missing': missing}), 200
+
+
 @app.route('/judge_types', methods=['GET'])
+@cached
 def get_all_judge_types() -> tuple:
     """API that returns all the judge_types."""
 
-    try:
-        conn = get_db_connection(ENV)
-
-    except OperationalError as e:
-        return jsonify({'error': 'Error while connecting to PostgreSQL. Please check your connection.'})
+    conn = get_conn()
 
     circuits = get_table(conn, 'judge_type')
-    conn.close()
     if circuits:
         return jsonify({'judge_type': circuits}), 200
     else:
         return jsonify({'message': 'No judge_type found'}), 404
 
 
+@app.route('/stats/<stat>', methods=['GET'])
+@cached
+def get_statistic(stat: str) -> tuple:
+    """API that returns precomputed aggregate statistics."""
+
+    if stat not in STATS_VIEWS:
+        return jsonify({'error': f'Statistic {stat} does not exist. '
+                        f'Choose from: {", ".join(STATS_VIEWS)}.'}), 404
+
+    return jsonify({stat: get_stats(get_conn(), stat)}), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics() -> tuple:
+    """API that returns the database connection pool metrics."""
+
+    return jsonify({'pool': get_db_pool(ENV).get_metrics()}), 200
+
+
 if __name__ == "__main__":
 
     load_dotenv()
 
-    app.run(debug=True, host="0.0.0.0", port=5000)
+    app.run(debug=ENV.get("FLASK_DEBUG") == "1", host="0.0.0.0", port=5000)
@@ -0,0 +1,334 @@
+'''Async version of the read endpoints of the Flask API, served with an ASGI server.
+Queries run on a non-blocking connection pool, so one process overlaps the database waits
+of many concurrent requests. Routes and JSON responses match app.py.
+
+Run with e.g. hypercorn --bind 0.0.0.0:5000 --workers 2 async_app:app'''
+
+from os import environ as ENV
+from functools import wraps
+
+from dotenv import load_dotenv
+from psycopg import OperationalError
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
+from quart import Quart, Response, jsonify, make_response, render_template, request, url_for
+
+from cache import AsyncDataVersion, ResponseCache, get_cache_key, make_cache_entry
+from queries import (get_fields, get_page_size, get_expansions, validate_judge_filters,
+                     validate_judge_id, get_next_page_args, get_search_offset, get_batch_ids,
+                     validate_case_nos, validate_judge_ids, get_batch_result, STATS_VIEWS)
+from async_queries import (get_table, get_case_by_case_no, get_judge_by_id, search_cases,
+                           get_page, get_cases_by_case_nos, get_judges_by_ids, get_stats,
+                           get_case_detail)
+
+PAGE_ARGS = ['limit', 'after', 'fields']
+
+CACHE = ResponseCache(int(ENV.get("CACHE_MAXSIZE", 256)),
+                      float(ENV.get("CACHE_TTL", 300)))
+DATA_VERSION = AsyncDataVersion(float(ENV.get("CACHE_VERSION_INTERVAL", 5)))
+
+# Opened when the server starts, inside each worker's event loop.
+POOL = None
+
+
+app = Quart(__name__)
+
+
+@app.before_serving
+async def open_pool() -> None:
+    """Opens the worker's connection pool."""
+
+    global POOL
+
+    load_dotenv()
+
+    POOL = AsyncConnectionPool(min_size=int(ENV.get("DB_POOL_MIN", 1)),
+                               max_size=int(ENV.get("DB_POOL_MAX", 10)),
+                               timeout=float(ENV.get("DB_POOL_TIMEOUT", 5)),
+                               kwargs={'user': ENV["DB_USER"],
+                                       'password': ENV["DB_PASSWORD"],
+                                       'host': ENV["DB_HOST"],
+                                       'port': ENV["DB_PORT"],
+                                       'dbname': ENV["DB_NAME"],
+                                       'row_factory': dict_row},
+                               open=False)
+    await POOL.open()
+
+
+@app.after_serving
+async def close_pool() -> None:
+    """Closes the worker's connection pool on shutdown."""
+
+    await POOL.close()
+
+
+def get_conn():
+    """Returns a context manager that checks out a pooled connection
+    and returns it to the pool when the block ends."""
+
+    return POOL.connection()
+
+
+@app.errorhandler(OperationalError)
+@app.errorhandler(PoolTimeout)
+async def handle_connection_error(e) -> tuple:
+    """Returns an error if no database connection could be made."""
+
+    return jsonify({'error': 'Error while connecting to PostgreSQL. Please check your connection.'}), 503
+
+
+def cached(view):
+    """Caches a view's successful responses by url and query string until the data version changes.
+    Responses carry a strong ETag, and matching If-None-Match requests get a 304."""
+
+    @wraps(view)
+    async def wrapper(*args, **kwargs):
+
+        key = get_cache_key(request.base_url, request.args)
+        version = await DATA_VERSION.get(get_conn)
+
+        entry = CACHE.get(key, version)
+
+        if entry is None:
+            response = await make_response(await view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            entry = make_cache_entry(await response.get_data(), response.mimetype)
+            CACHE.set(key, version, entry)
+
+        body, mimetype, etag = entry
+        response = Response(body, mimetype=mimetype)
+        response.set_etag(etag)
+
+        return await response.make_conditional(request)
+
+    return wrapper
+
+
+def get_next_link(rows: list, table: str, limit: int):
+    """Returns the url of the page after the given rows, or None on the last page."""
+
+    args = get_next_page_args(request.args.to_dict(), rows, table, limit)
+
+    return url_for(request.endpoint, _external=True, **args) if args else None
+
+
+async def get_paginated(table: str, filters: dict = None) -> tuple[list, str]:
+    """Returns a page of a table using the limit, after and fields request args,
+    along with the link to the next page."""
+
+    args = request.args
+    limit = get_page_size(args.get('limit'))
+    columns = get_fields(table, args.get('fields'))
+
+    async with get_conn() as conn:
+        rows = await get_page(conn, table, columns, limit, args.get('after'), filters)
+
+    return rows, get_next_link(rows, table, limit)
+
+
+async def get_search_results(search: str, filters: dict = None) -> tuple:
+    """Returns a page of ranked search results using the limit and page request args.
+    Filters are equality conditions on integer id columns of the cases."""
+
+    limit = get_page_size(request.args.get('limit'))
+    page = request.args.get('page', '1')
+    offset = get_search_offset(page, limit)
+
+    async with get_conn() as conn:
+        cases = await search_cases(conn, search, limit, offset, filters)
+
+    if not cases:
+        return jsonify({'message': 'No cases found'}), 404
+
+    next_link = None
+    if len(cases) == limit:
+        args = request.args.to_dict()
+        args['page'] = int(page) + 1
+        next_link = url_for(request.endpoint, _external=True, **args)
+
+    return jsonify({'cases': cases, 'next': next_link}), 200
+
+
+@app.route('/')
+async def home() -> str:
+    """Render the home page."""
+    return await render_template('homepage.html')
+
+
+@app.route('/cases', methods=['GET'])
+async def get_all_cases() -> tuple:
+    """API that returns the cases, a page at a time."""
+
+    args = request.args.to_dict()
+    judge = args.get('judge_id', None)
+    search = args.get('search', None)
+
+    try:
+        filters = {}
+        if judge:
+            validate_judge_id(judge)
+            filters['judge_id'] = judge
+
+        if search:
+            return await get_search_results(search, filters)
+
+        cases, next_link = await get_paginated('transcript', filters)
+
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'{e}'}), 400
+
+    if cases or 'after' in args:
+        return jsonify({'cases': cases, 'next': next_link}), 200
+    else:
+        return jsonify({'message': 'No cases found'}), 404
+
+
+@app.route('/cases/<case_no>', methods=['GET'])
+async def get_case_by_case_number(case_no: str) -> tuple:
+    """API that returns information about a specific case.
+    The expand argument joins on its judge (with circuit and judge type)
+    and/or the judge's related cases, in the same query."""
+
+    try:
+        expansions = get_expansions(request.args.get('expand'))
+    except ValueError as e:
+        return jsonify({'error': f'{e}'}), 400
+
+    async with get_conn() as conn:
+        if expansions:
+            case = await get_case_detail(conn, case_no, expansions)
+        else:
+            case = await get_case_by_case_no(conn, case_no)
+
+    if case:
+        return jsonify({'case': case}), 200
+    else:
+        return jsonify({'message': f'Case with case number {case_no} not found'}), 404
+
+
+@app.route('/cases/batch', methods=['POST'])
+async def get_cases_batch() -> tuple:
+    """API that returns the cases for a list of case numbers, keyed by case number."""
+
+    try:
+        case_nos = validate_case_nos(get_batch_ids(await request.get_json(silent=True), 'case_nos'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'{e}'}), 400
+
+    async with get_conn() as conn:
+        cases, missing = get_batch_result(case_nos, await get_cases_by_case_nos(conn, case_nos))
+
+    return jsonify({'cases': cases, 'missing': missing}), 200
+
+
+@app.route('/circuits', methods=['GET'])
+@cached
+async def get_all_circuits() -> tuple:
+    """API that returns all the circuits."""
+
+    async with get_conn() as conn:
+        circuits = await get_table(conn, 'circuit')
+
+    if circuits:
+        return jsonify({'circuits': circuits}), 200
+    else:
+        return jsonify({'message': 'No circuits found'}), 404
+
+
+@app.route('/judges', methods=['GET'])
+@cached
+async def get_all_judges() -> tuple:
+    """API that returns the judges, a page at a time."""
+
+    filters = {key: value for key, value in request.args.to_dict().items()
+               if key not in PAGE_ARGS}
+
+    try:
+        validate_judge_filters(filters)
+    except Exception as e:
+        return jsonify({'error': f'{e}'}), 404
+
+    try:
+        judge, next_link = await get_paginated('judge', filters)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'{e}'}), 400
+
+    if judge or 'after' in request.args:
+        return jsonify({'judges': judge, 'next': next_link}), 200
+    else:
+        return jsonify({'message': 'No judges found'}), 404
+
+
+@app.route('/judges/<judge_id>', methods=['GET'])
+async def get_all_judges_by_id(judge_id: str) -> tuple:
+    """API that returns all the judges by given id."""
+
+    try:
+        async with get_conn() as conn:
+            judge = await get_judge_by_id(conn, judge_id)
+
+    except TypeError as e:
+        return jsonify({'error': f'{e}'}), 404
+
+    if judge:
+        return jsonify({'judges': judge}), 200
+    else:
+        return jsonify({'message': f'Judge with judge_id {judge_id} not found'}), 404
+
+
+@app.route('/judges/batch', methods=['POST'])
+async def get_judges_batch() -> tuple:
+    """API that returns the judges for a list of judge ids, keyed by judge id."""
+
+    try:
+        judge_ids = validate_judge_ids(get_batch_ids(await request.get_json(silent=True), 'judge_ids'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'{e}'}), 400
+
+    async with get_conn() as conn:
+        judges, missing = get_batch_result(judge_ids, await get_judges_by_ids(conn, judge_ids))
+
+    return jsonify({'judges': judges, 'missing': missing}), 200
+
+
+@app.route('/judge_types', methods=['GET'])
+@cached
+async def get_all_judge_types() -> tuple:
+    """API that returns all the judge_types."""
+
+    async with get_conn() as conn:
+        judge_types = await get_table(conn, 'judge_type')
+
+    if judge_types:
+        return jsonify({'judge_type': judge_types}), 200
+    else:
+        return jsonify({'message': 'No judge_type found'}), 404
+
+
+@app.route('/stats/<stat>', methods=['GET'])
+@cached
+async def get_statistic(stat: str) -> tuple:
+    """API that returns precomputed aggregate statistics."""
+
+    if stat not in STATS_VIEWS:
+        return jsonify({'error': f'Statistic {stat} does not exist. '
+                        f'Choose from: {", ".join(STATS_VIEWS)}.'}), 404
+
+    async with get_conn() as conn:
+        stats = await get_stats(conn, stat)
+
+    return jsonify({stat: stats}), 200
+
+
+@app.route('/metrics', methods=['GET'])
+async def get_metrics() -> tuple:
+    """API that returns the database connection pool metrics."""
+
+    return jsonify({'pool': POOL.get_stats()}), 200
+
+
+if __name__ == "__main__":
+
+    app.run(debug=ENV.get("FLASK_DEBUG") == "1", host="0.0.0.0", port=5000)
@@ -0,0 +1,110 @@
+'''Async versions of the read queries in queries.py, for the async API.
+The queries and argument checks are shared with queries.py, so both APIs accept and return the same data.'''
+
+from psycopg import AsyncConnection
+
+from queries import (DEFAULT_PAGE_SIZE, RELATED_LIMIT, TABLES,
+                     JUDGE_QUERY, CASE_QUERY, CASES_BY_CASE_NOS_QUERY, JUDGES_BY_IDS_QUERY,
+                     quote_identifier, validate_judge_id, build_page_query, build_search_query,
+                     get_case_detail_query, get_stats_query)
+
+
+async def fetch_all(conn: AsyncConnection, query: str, params=None) -> list[dict]:
+    '''Returns every row of a query.'''
+
+    async with conn.cursor() as cur:
+        await cur.execute(query, params)
+        rows = await cur.fetchall()
+
+    return rows
+
+
+async def fetch_one(conn: AsyncConnection, query: str, params=None) -> dict:
+    '''Returns the first row of a query, or None.'''
+
+    async with conn.cursor() as cur:
+        await cur.execute(query, params)
+        row = await cur.fetchone()
+
+    return row
+
+
+async def get_table(conn: AsyncConnection, table: str) -> list[dict]:
+    '''Returns table information as a list.
+    Only accepts table names: circuit, transcript, judge and judge_type.'''
+
+    if table in TABLES:
+        return await fetch_all(conn, f"SELECT * FROM {quote_identifier(table)};")
+
+    return {'ERROR': f'Table {table} does not exist.'}
+
+
+async def get_judge_by_id(conn: AsyncConnection, judge_id: str) -> dict:
+    '''Returns all information about a specific judge.'''
+
+    validate_judge_id(judge_id)
+
+    judge = await fetch_one(conn, JUDGE_QUERY, (int(judge_id),))
+
+    if not judge:
+        return {'ERROR': f"No judge with ID {judge_id} exists."}
+
+    return judge
+
+
+async def get_case_by_case_no(conn: AsyncConnection, case_no: str) -> dict:
+    '''Returns all information about a specific case.'''
+
+    return await fetch_one(conn, CASE_QUERY, (case_no,))
+
+
+async def get_case_detail(conn: AsyncConnection, case_no: str, expansions: list[str]) -> dict:
+    '''Returns a case with the requested related records joined on, in a single query.'''
+
+    return await fetch_one(conn, get_case_detail_query(expansions),
+                           {'case_no': case_no, 'related_limit': RELATED_LIMIT})
+
+
+async def get_cases_by_case_nos(conn: AsyncConnection, case_nos: list[str]) -> dict[str, dict]:
+    '''Returns the case for each of the given case numbers in a single query.
+    Case numbers with no case are missing from the returned dict.'''
+
+    cases = await fetch_all(conn, CASES_BY_CASE_NOS_QUERY, (case_nos,))
+
+    return {case['case_no']: case for case in cases}
+
+
+async def get_judges_by_ids(conn: AsyncConnection, judge_ids: list[int]) -> dict[int, dict]:
+    '''Returns the judge for each of the given ids in a single query.
+    Ids with no judge are missing from the returned dict.'''
+
+    judges = await fetch_all(conn, JUDGES_BY_IDS_QUERY, (judge_ids,))
+
+    return {judge['judge_id']: judge for judge in judges}
+
+
+async def get_stats(conn: AsyncConnection, stat: str) -> list[dict]:
+    '''Returns a precomputed statistic from its materialized view.
+    Only accepts the statistics in STATS_VIEWS.'''
+
+    return await fetch_all(conn, get_stats_query(stat))
+
+
+async def get_page(conn: AsyncConnection, table: str, columns: list[str], limit: int,
+                   after: str = None, filters: dict = None) -> list[dict]:
+    '''Returns one page of a table ordered by its key, starting after the given key (keyset pagination).
+    Filters are equality conditions on integer id columns of the table.'''
+
+    query, params = build_page_query(table, columns, limit, after, filters)
+
+    return await fetch_all(conn, query, params)
+
+
+async def search_cases(conn: AsyncConnection, search: str, limit: int = DEFAULT_PAGE_SIZE,
+                       offset: int = 0, filters: dict = None) -> list[dict]:
+    '''Returns a page of cases matching a web-style search of their title, summary and verdict.
+    Cases are ordered by relevance and include a highlighted snippet of the summary.'''
+
+    query, params = build_search_query(search, limit, offset, filters)
+
+    return await fetch_all(conn, query, params)
@@ -0,0 +1,113 @@
+'''In-process response cache for read-only API endpoints.'''
+
+from collections import OrderedDict
+from hashlib import sha256
+from threading import Lock
+from time import monotonic
+from typing import Callable
+
+
+def get_cache_key(url: str, args) -> str:
+    '''Returns the cache key of a request from its url without the query string
+    and its query string args (a MultiDict), so the same args in any order share an entry.
+    The url includes the scheme and host, as responses link to other pages by absolute url.'''
+
+    return url + '?' + '&'.join(sorted(
+        f'{arg}={value}' for arg, values in args.lists() for value in values))
+
+
+def make_cache_entry(body: bytes, mimetype: str) -> tuple[bytes, str, str]:
+    '''Returns the cached form of a response: its body, mimetype and strong ETag.'''
+
+    return body, mimetype, sha256(body).hexdigest()
+
+
+class ResponseCache:
+    '''A thread-safe TTL and LRU cache of responses.
+    Each entry is tagged with the data version it was built from
+    and is treated as a miss once the data version moves on.'''
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str, version: int):
+        '''Returns the cached value for a key, or None if missing, expired or stale.'''
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            expires, entry_version, value = entry
+            if expires < monotonic() or entry_version != version:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, version: int, value) -> None:
+        '''Caches a value, evicting the least recently used entry if full.'''
+
+        with self._lock:
+            self._entries[key] = (monotonic() + self.ttl, version, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        '''Removes every entry.'''
+
+        with self._lock:
+            self._entries.clear()
+
+
+class DataVersion:
+    '''The data version counter bumped by the pipelines after each load.
+    The database is read at most once per interval, so cache hits in between need no connection.'''
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._version = None
+        self._checked = 0.0
+        self._lock = Lock()
+
+    def get(self, get_conn: Callable):
+        '''Returns the current data version, using get_conn to read it once the interval has passed.'''
+
+        with self._lock:
+            if self._version is not None and monotonic() - self._checked < self.interval:
+                return self._version
+
+        with get_conn().cursor() as cur:
+            cur.execute("SELECT version FROM data_version;")
+            row = cur.fetchone()
+
+        with self._lock:
+            self._version = row['version'] if row else 0
+            self._checked = monotonic()
+            return self._version
+
+
+class AsyncDataVersion(DataVersion):
+    '''A DataVersion for the async API, read with an async connection.'''
+
+    async def get(self, get_conn: Callable):
+        '''Returns the current data version, using get_conn to read it once the interval has passed.'''
+
+        if self._version is not None and monotonic() - self._checked < self.interval:
+            return self._version
+
+        async with get_conn() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT version FROM data_version;")
+                row = await cur.fetchone()
+
+        self._version = row['version'] if row else 0
+        self._checked = monotonic()
+        return self._version
@@ -0,0 +1,131 @@
+'''Process-wide database connection pool for the API.'''
+
+from threading import BoundedSemaphore, Lock
+from time import perf_counter
+
+from psycopg2 import OperationalError, InterfaceError
+from psycopg2.extensions import connection
+from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+
+
+# Created on the first request of each process (i.e. after any worker fork).
+POOL = None
+POOL_LOCK = Lock()
+
+
+class BlockingConnectionPool(ThreadedConnectionPool):
+    '''A ThreadedConnectionPool that waits for a free connection instead of raising,
+    and records how long checkouts wait.'''
+
+    def __init__(self, minconn: int, maxconn: int, timeout: float, *args, **kwargs):
+        self.timeout = timeout
+        self._slots = BoundedSemaphore(maxconn)
+        self._metrics_lock = Lock()
+        self.waiting = 0
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key=None) -> connection:
+        '''Checks out a connection, waiting up to timeout seconds for one to be free.'''
+
+        start = perf_counter()
+        with self._metrics_lock:
+            self.waiting += 1
+
+        acquired = self._slots.acquire(timeout=self.timeout)
+
+        wait = perf_counter() - start
+        with self._metrics_lock:
+            self.waiting -= 1
+
+        if not acquired:
+            raise PoolError("Timed out waiting for a database connection.")
+
+        try:
+            conn = super().getconn(key)
+            if conn.closed:
+                super().putconn(conn, key, close=True)
+                conn = super().getconn(key)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._metrics_lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+        return conn
+
+    def putconn(self, conn: connection, key=None, close: bool = False) -> None:
+        '''Returns a connection to the pool and frees its slot.'''
+
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self._slots.release()
+
+    def get_metrics(self) -> dict:
+        '''Returns the pool size and checkout wait statistics.'''
+
+        with self._metrics_lock:
+            average_wait = self.total_wait / self.checkouts if self.checkouts else 0.0
+
+            return {'min_size': self.minconn,
+                    'max_size': self.maxconn,
+                    'in_use': len(self._used),
+                    'idle': len(self._pool),
+                    'waiting': self.waiting,
+                    'checkouts': self.checkouts,
+                    'avg_wait_ms': round(average_wait * 1000, 3),
+                    'max_wait_ms': round(self.max_wait * 1000, 3)}
+
+
+def get_db_pool(config) -> BlockingConnectionPool:
+    '''Returns the process-wide connection pool, creating it if needed.'''
+
+    global POOL
+
+    with POOL_LOCK:
+        if POOL is None or POOL.closed:
+            POOL = BlockingConnectionPool(int(config.get("DB_POOL_MIN", 1)),
+                                          int(config.get("DB_POOL_MAX", 10)),
+                                          float(config.get("DB_POOL_TIMEOUT", 5)),
+                                          user=config["DB_USER"],
+                                          password=config["DB_PASSWORD"],
+                                          host=config["DB_HOST"],
+                                          port=config["DB_PORT"],
+                                          database=config["DB_NAME"],
+                                          cursor_factory=RealDictCursor)
+
+    return POOL
+
+
+def close_db_pool() -> None:
+    '''Closes every connection in the process-wide pool.'''
+
+    global POOL
+
+    with POOL_LOCK:
+        if POOL is not None and not POOL.closed:
+            POOL.closeall()
+
+        POOL = None
+
+
+def release_db_connection(conn: connection) -> None:
+    '''Ends any open transaction and returns the connection to the pool.
+    Broken connections are discarded rather than reused.'''
+
+    close = bool(conn.closed)
+
+    if not close:
+        try:
+            conn.rollback()
+        except (OperationalError, InterfaceError):
+            close = True
+
+    POOL.putconn(conn, close=close)
@@ -0,0 +1,59 @@
+'''Functions that encode streamed rows for bulk exports.'''
+
+from csv import writer
+from io import StringIO
+from json import dumps
+from typing import Iterable, Iterator
+import zlib
+
+from queries import EXPORT_BATCH_SIZE
+
+
+def batch_rows(rows: Iterable[dict], batch_size: int) -> Iterator[list[dict]]:
+    '''Groups rows into lists of at most batch_size.'''
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def encode_ndjson(rows: Iterable[dict], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    '''Yields rows as newline delimited JSON, one chunk per batch of rows.'''
+
+    for batch in batch_rows(rows, batch_size):
+        yield ''.join(dumps(row, default=str) + '\n' for row in batch).encode()
+
+
+def encode_csv(rows: Iterable[dict], columns: list[str],
+               batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    '''Yields a header line and then rows as CSV, one chunk per batch of rows.'''
+
+    buffer = StringIO()
+    csv_writer = writer(buffer)
+
+    csv_writer.writerow(columns)
+    yield buffer.getvalue().encode()
+
+    for batch in batch_rows(rows, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        csv_writer.writerows([row[column] for column in columns] for row in batch)
+        yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    '''Compresses a stream of chunks into a single gzip stream.
+    Each chunk is flushed so the client receives data as soon as it is read.'''
+
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    yield compressor.flush()
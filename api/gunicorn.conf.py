@@ -0,0 +1,36 @@
+'''Gunicorn settings for serving the API in production.
+Each setting can be overridden with the environment variables below.'''
+
+from os import environ as ENV
+from multiprocessing import cpu_count
+
+
+bind = f"0.0.0.0:{ENV.get('PORT', 5000)}"
+
+# Threaded workers: each process holds its own connection pool,
+# so DB_POOL_MAX should be at least GUNICORN_THREADS.
+worker_class = "gthread"
+workers = int(ENV.get("WEB_CONCURRENCY", cpu_count() * 2 + 1))
+threads = int(ENV.get("GUNICORN_THREADS", 4))
+
+# Keep idle client connections open longer than the load balancer's
+# 60 second idle timeout, so it never reuses a connection we have closed.
+keepalive = int(ENV.get("GUNICORN_KEEPALIVE", 75))
+
+timeout = int(ENV.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(ENV.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+# Recycle workers periodically to bound memory growth.
+max_requests = int(ENV.get("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(ENV.get("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+
+accesslog = "-"
+errorlog = "-"
+
+
+def worker_exit(server, worker):
+    '''Closes the worker's database connections once it has finished its in-flight requests.'''
+
+    from db_pool import close_db_pool
+
+    close_db_pool()
@@ -0,0 +1,135 @@
+'''Load tests a running API with many concurrent clients.
+Reports throughput and latency percentiles for each endpoint, and exits with an error
+if any endpoint's p99 latency exceeds --max-p99, so it can be used to catch regressions.
+
+Seed a local database first, e.g. with database/seed_synthetic.py, then run
+the API with gunicorn and point --url at it. To compare the sync and async APIs,
+run both and pass the async API's url as --compare.'''
+
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from threading import local
+from time import perf_counter
+import sys
+
+import requests
+
+
+DEFAULT_PATHS = ['/circuits', '/judge_types', '/judges', '/judges/42',
+                 '/cases?fields=transcript_id,case_no,title', '/cases?judge_id=42',
+                 '/cases/CL-2012-000012', '/cases?search=contract', '/stats/cases_per_judge']
+
+SESSIONS = local()
+
+
+def get_session() -> requests.Session:
+    '''Returns a keep-alive session for the current client thread.'''
+
+    if not hasattr(SESSIONS, 'session'):
+        SESSIONS.session = requests.Session()
+
+    return SESSIONS.session
+
+
+def timed_get(url: str) -> tuple[float, int]:
+    '''Returns the latency in seconds and status code of a GET request.'''
+
+    start = perf_counter()
+    try:
+        status = get_session().get(url, timeout=30).status_code
+    except requests.RequestException:
+        status = 0
+
+    return perf_counter() - start, status
+
+
+def percentile(latencies: list[float], pct: float) -> float:
+    '''Returns the given percentile of a list of latencies, in ms.'''
+
+    ordered = sorted(latencies)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+
+    return ordered[index] * 1000
+
+
+def load_test_path(executor: ThreadPoolExecutor, url: str, requests_per_path: int) -> dict:
+    '''Sends requests to one url from every client at once and returns its statistics.'''
+
+    start = perf_counter()
+    results = list(executor.map(timed_get, [url] * requests_per_path))
+    elapsed = perf_counter() - start
+
+    latencies = [latency for latency, _ in results]
+
+    return {'requests': len(results),
+            'errors': sum(1 for _, status in results if status == 0 or status >= 500),
+            'throughput': len(results) / elapsed,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99)}
+
+
+def run(base_url: str, paths: list[str], concurrency: int,
+        requests_per_path: int, warmup: int) -> dict[str, dict]:
+    '''Load tests each path in turn and prints a summary table.
+    Returns the statistics of each path.'''
+
+    stats = {}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for path in paths:
+            url = base_url.rstrip('/') + path
+            list(executor.map(timed_get, [url] * warmup))
+            stats[path] = load_test_path(executor, url, requests_per_path)
+
+    print(f"clients: {concurrency}  requests per endpoint: {requests_per_path}")
+    print(f"{'endpoint':<45}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for path, path_stats in stats.items():
+        print(f"{path:<45}{path_stats['throughput']:>9.1f}{path_stats['p50']:>9.1f}"
+              f"{path_stats['p95']:>9.1f}{path_stats['p99']:>9.1f}{path_stats['errors']:>8}")
+
+    return stats
+
+
+def print_comparison(baseline: dict[str, dict], candidate: dict[str, dict]) -> None:
+    '''Prints the throughput and p99 latency of each path under two APIs side by side.'''
+
+    print(f"{'endpoint':<45}{'req/s':>9}{'vs':>9}{'p99 ms':>9}{'vs':>9}{'speedup':>9}")
+    for path, base in baseline.items():
+        other = candidate[path]
+        print(f"{path:<45}{base['throughput']:>9.1f}{other['throughput']:>9.1f}"
+              f"{base['p99']:>9.1f}{other['p99']:>9.1f}"
+              f"{other['throughput'] / base['throughput']:>8.2f}x")
+
+
+if __name__ == '__main__':
+
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=500,
+                        help='requests sent to each endpoint')
+    parser.add_argument('--warmup', type=int, default=50,
+                        help='untimed requests sent to each endpoint first')
+    parser.add_argument('--max-p99', type=float, default=None,
+                        help='fail if any endpoint p99 latency exceeds this many ms')
+    parser.add_argument('--compare', default=None,
+                        help='url of a second API, e.g. the async API, to compare against --url')
+    parser.add_argument('paths', nargs='*', default=DEFAULT_PATHS)
+    args = parser.parse_args()
+
+    results = run(args.url, args.paths, args.concurrency, args.requests, args.warmup)
+
+    if args.compare:
+        compared = run(args.compare, args.paths, args.concurrency, args.requests, args.warmup)
+        print_comparison(results, compared)
+        results = {**{f'{args.url}{path}': stats for path, stats in results.items()},
+                   **{f'{args.compare}{path}': stats for path, stats in compared.items()}}
+
+    failures = [path for path, path_stats in results.items()
+                if path_stats['errors']
+                or (args.max_p99 is not None and path_stats['p99'] > args.max_p99)]
+
+    if failures:
+        print(f"Failed: {', '.join(failures)}")
+        sys.exit(1)
@@ -1,12 +1,87 @@
 '''Functions that query the database for information.'''
 
 from os import environ as ENV
+from typing import Iterator
 
 from dotenv import load_dotenv
 from psycopg2 import connect, sql
 from psycopg2.extras import RealDictCursor, RealDictRow
 
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+EXPORT_BATCH_SIZE = 2000
+BATCH_LIMIT = 100
+RELATED_LIMIT = 10
+
+# Related records that can be joined onto a case with the expand argument
+CASE_EXPANSIONS = ['judge', 'related']
+
+# Statistics served from materialized views, with the columns they are ordered by
+STATS_VIEWS = {'cases_per_judge': ('case_count_by_judge', ['judge_id']),
+               'verdicts_per_circuit': ('verdict_count_by_circuit', ['circuit_id']),
+               'appointments_per_year': ('appointment_count_by_year', ['year', 'gender'])}
+
+SNIPPET_OPTIONS = 'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=8'
+
+TABLE_KEYS = {'transcript': 'transcript_id',
+              'judge': 'judge_id'}
+
+TABLE_COLUMNS = {'transcript': ['transcript_id', 'case_no', 'judge_id', 'verdict',
+                                'outcome', 'summary', 'title', 'transcript_date'],
+                 'judge': ['judge_id', 'name', 'appointed', 'circuit_id',
+                           'judge_type_id', 'gender']}
+
+TABLES = ['circuit', 'transcript', 'judge', 'judge_type']
+
+
+def quote_identifier(name: str) -> str:
+    '''Returns a table or column name quoted for a query.
+    Only used on names from the constants above, never on user input.'''
+
+    return f'"{name}"'
+
+
+def join_columns(table: str, columns: list[str]) -> str:
+    '''Returns the columns of a table as a quoted, comma separated list.
+    Raises a ValueError for any column the table does not have, so the list is safe to put in a query.
+    Queries are built as strings, so they can be shared by the sync and async APIs.'''
+
+    invalid = [column for column in columns if column not in TABLE_COLUMNS[table]]
+    if invalid:
+        raise ValueError(f"Invalid column(s): {', '.join(invalid)}.")
+
+    return ", ".join(map(quote_identifier, columns))
+
+
+JUDGE_QUERY = "SELECT * FROM judge WHERE judge_id = %s;"
+
+CASE_QUERY = f"""SELECT {join_columns('transcript', TABLE_COLUMNS['transcript'])} FROM transcript
+                 WHERE case_no = %s;"""
+
+CASES_BY_CASE_NOS_QUERY = f"""SELECT DISTINCT ON (case_no) {join_columns('transcript', TABLE_COLUMNS['transcript'])}
+                              FROM transcript
+                              WHERE case_no = ANY(%s)
+                              ORDER BY case_no, transcript_id;"""
+
+JUDGES_BY_IDS_QUERY = f"""SELECT {join_columns('judge', TABLE_COLUMNS['judge'])} FROM judge
+                          WHERE judge_id = ANY(%s);"""
+
+SEARCH_QUERY = """
+               SELECT transcript_id, case_no, judge_id, verdict, outcome, title, transcript_date,
+                   ts_headline('english', summary, query, %s) AS snippet,
+                   rank
+               FROM (
+                   SELECT t.*, ts_rank_cd(t.search_vector, query) AS rank, query
+                   FROM transcript AS t, websearch_to_tsquery('english', %s) AS query
+                   WHERE {conditions}
+                   ORDER BY rank DESC, t.transcript_id
+                   LIMIT %s OFFSET %s
+               ) AS results
+               ORDER BY rank DESC, transcript_id;
+               """
+
+
 def get_db_connection(config):
     '''Establishes connection to the database.'''
 
@@ -23,12 +98,11 @@ def get_table(conn, table: str) -> list[RealDictRow]:
     '''Returns table information as a list.
     Only accepts table names: circuit, transcript, judge and judge_type.'''
 
-    if table in ['circuit', 'transcript', 'judge', 'judge_type']:
+    if table in TABLES:
 
         with conn.cursor() as cur:
 
-            cur.execute(
-                sql.SQL("SELECT * FROM {};").format(sql.Identifier(table)))
+            cur.execute(f"SELECT * FROM {quote_identifier(table)};")
             rows = cur.fetchall()
 
         return rows
@@ -39,13 +113,11 @@ def get_table(conn, table: str) -> list[RealDictRow]:
 def get_judge_by_id(conn, judge_id: int) -> list[RealDictRow]:
     '''Returns all information about a specific judge.'''
 
-    if not judge_id.isnumeric():
-        raise TypeError("Judge id must be an integer.")
+    validate_judge_id(judge_id)
 
     with conn.cursor() as cur:
 
-        cur.execute(f"""SELECT * FROM judge
-                            WHERE judge_id = {judge_id};""")
+        cur.execute(JUDGE_QUERY, (int(judge_id),))
 
         judge = cur.fetchone()
 
@@ -60,8 +132,7 @@ def get_case_by_case_no(conn, case_no: str) -> list[RealDictRow]:
 
     try:
         with conn.cursor() as cur:
-            cur.execute(
-                """SELECT * FROM transcript WHERE case_no = %s;""", (case_no,))
+            cur.execute(CASE_QUERY, (case_no,))
             case = cur.fetchone()
 
         return case
@@ -71,66 +142,309 @@ def get_case_by_case_no(conn, case_no: str) -> list[RealDictRow]:
         return None
 
 
-def filter_judges(conn, filters: dict) -> list[RealDictRow]:
-    '''Filters judges by circuit and/or judge_type.'''
+def get_expansions(expand: str = None) -> list[str]:
+    '''Returns the related records to join onto a case.
+    Takes a comma separated list of CASE_EXPANSIONS, or None for none.'''
 
-    if not all([f in ['circuit_id', 'judge_type_id'] for f in filters]):
-        raise ValueError(f"Invalid filter.")
+    if not expand:
+        return []
 
-    if not all([f.isnumeric() for f in filters.values()]):
-        raise TypeError(f"ID must be an integer.")
+    requested = [option.strip() for option in expand.split(',') if option.strip()]
+
+    invalid = [option for option in requested if option not in CASE_EXPANSIONS]
+    if invalid:
+        raise ValueError(f"Invalid expand option(s): {', '.join(invalid)}. "
+                         f"Choose from: {', '.join(CASE_EXPANSIONS)}.")
+
+    return [option for option in CASE_EXPANSIONS if option in requested]
+
+
+def get_case_detail_query(expansions: list[str]) -> str:
+    '''Returns the query for a case with its judge, circuit and judge type joined,
+    and optionally the latest other cases by the same judge.
+    Built only from constants, so it can be shared with the async API.'''
+
+    columns = [f"t.{column}" for column in TABLE_COLUMNS['transcript']]
+
+    if 'judge' in expansions:
+        columns.append("""json_build_object(
+                'judge_id', j.judge_id, 'name', j.name, 'appointed', j.appointed, 'gender', j.gender,
+                'circuit', CASE WHEN c.circuit_id IS NULL THEN NULL
+                    ELSE json_build_object('circuit_id', c.circuit_id, 'name', c.name) END,
+                'judge_type', json_build_object('judge_type_id', jt.judge_type_id,
+                                                'type_name', jt.type_name)) AS judge""")
+
+    if 'related' in expansions:
+        columns.append("""(SELECT COALESCE(json_agg(r ORDER BY r.transcript_date DESC, r.transcript_id), '[]')
+                FROM (SELECT transcript_id, case_no, title, verdict, outcome, transcript_date
+                      FROM transcript
+                      WHERE judge_id = t.judge_id AND transcript_id <> t.transcript_id
+                      ORDER BY transcript_date DESC, transcript_id
+                      LIMIT %(related_limit)s) AS r) AS related_cases""")
+
+    return f"""SELECT {', '.join(columns)}
+                      FROM transcript AS t
+                      JOIN judge AS j
+                          ON t.judge_id = j.judge_id
+                      JOIN judge_type AS jt
+                          ON j.judge_type_id = jt.judge_type_id
+                      LEFT JOIN circuit AS c
+                          ON j.circuit_id = c.circuit_id
+                      WHERE t.case_no = %(case_no)s
+                      ORDER BY t.transcript_id
+                      LIMIT 1;"""
+
+
+def get_case_detail(conn, case_no: str, expansions: list[str]) -> RealDictRow:
+    '''Returns a case with the requested related records joined on, in a single query.'''
+
+    with conn.cursor() as cur:
+        cur.execute(get_case_detail_query(expansions),
+                    {'case_no': case_no, 'related_limit': RELATED_LIMIT})
+        case = cur.fetchone()
+
+    return case
+
+
+def get_cases_by_case_nos(conn, case_nos: list[str]) -> dict[str, RealDictRow]:
+    '''Returns the case for each of the given case numbers in a single query.
+    Case numbers with no case are missing from the returned dict.'''
+
+    with conn.cursor() as cur:
+        cur.execute(CASES_BY_CASE_NOS_QUERY, (case_nos,))
+        cases = cur.fetchall()
+
+    return {case['case_no']: case for case in cases}
+
+
+def get_judges_by_ids(conn, judge_ids: list[int]) -> dict[int, RealDictRow]:
+    '''Returns the judge for each of the given ids in a single query.
+    Ids with no judge are missing from the returned dict.'''
 
     with conn.cursor() as cur:
+        cur.execute(JUDGES_BY_IDS_QUERY, (judge_ids,))
+        judges = cur.fetchall()
+
+    return {judge['judge_id']: judge for judge in judges}
+
+
+def get_stats_query(stat: str) -> str:
+    '''Returns the query for a precomputed statistic from its materialized view.
+    Only accepts the statistics in STATS_VIEWS.'''
 
-        if len(filters) == 1:
+    if stat not in STATS_VIEWS:
+        raise ValueError(f"Statistic {stat} does not exist.")
 
-            filter_by = list(filters.keys())[0]
-            print(filter_by)
+    view, order_by = STATS_VIEWS[stat]
 
-            cur.execute(sql.SQL("""SELECT * FROM judge WHERE {} = {}""").format(
-                sql.Identifier(filter_by), sql.SQL(filters[filter_by])))
+    return f"SELECT * FROM {quote_identifier(view)} ORDER BY {', '.join(map(quote_identifier, order_by))};"
 
-            judges = cur.fetchall()
 
-        elif len(filters) == 2:
+def get_stats(conn, stat: str) -> list[RealDictRow]:
+    '''Returns a precomputed statistic from its materialized view.
+    Only accepts the statistics in STATS_VIEWS.'''
 
-            cur.execute(sql.SQL("""SELECT * FROM judge WHERE {} = {} AND {} = {}""").format(
-                sql.Identifier('circuit_id'), sql.SQL(
-                    filters['circuit_id']),
-                sql.Identifier('judge_type_id'), sql.SQL(filters['judge_type_id'])))
+    with conn.cursor() as cur:
+        cur.execute(get_stats_query(stat))
+        rows = cur.fetchall()
+
+    return rows
 
-            judges = cur.fetchall()
 
-        else:
-            raise ValueError(
-                'Invalid filters for judges. Can only filter by circuit or judge type.')
+def validate_judge_filters(filters: dict) -> None:
+    '''Checks judges are only filtered by integer circuit and/or judge_type ids.'''
 
-    return judges
+    if not all([f in ['circuit_id', 'judge_type_id'] for f in filters]):
+        raise ValueError("Invalid filter.")
 
+    if not all([f.isnumeric() for f in filters.values()]):
+        raise TypeError("ID must be an integer.")
 
-def filter_cases_by_judge(conn, judge_id: int) -> list[RealDictRow]:
-    '''Filters cases by judge id.'''
+
+def validate_judge_id(judge_id: str) -> None:
+    '''Checks a judge id filter is an integer.'''
 
     if not judge_id.isnumeric():
         raise TypeError("Judge id must be an integer.")
 
+
+def get_fields(table: str, fields: str = None) -> list[str]:
+    '''Returns the columns to select from a paginated table.
+    Takes a comma separated list of fields, or None for every column.
+    The key column is always included so the next page can be found.'''
+
+    if not fields:
+        return TABLE_COLUMNS[table]
+
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+
+    invalid = [field for field in requested if field not in TABLE_COLUMNS[table]]
+    if invalid:
+        raise ValueError(f"Invalid field(s): {', '.join(invalid)}.")
+
+    key = TABLE_KEYS[table]
+
+    return [key] + [field for field in requested if field != key]
+
+
+def get_page_size(limit: str = None) -> int:
+    '''Returns the number of rows per page, capped at MAX_PAGE_SIZE.'''
+
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+
+    if not limit.isnumeric() or int(limit) == 0:
+        raise TypeError("Limit must be a positive integer.")
+
+    return min(int(limit), MAX_PAGE_SIZE)
+
+
+def build_page_query(table: str, columns: list[str], limit: int,
+                     after: str = None, filters: dict = None) -> tuple[str, list]:
+    '''Returns the query and parameters for one page of a table ordered by its key,
+    starting after the given key (keyset pagination).
+    Filters are equality conditions on integer id columns of the table.'''
+
+    key = TABLE_KEYS[table]
+
+    if after is not None and not after.isnumeric():
+        raise TypeError("After must be an integer.")
+
+    conditions = []
+    params = []
+
+    if after is not None:
+        conditions.append(f"{quote_identifier(key)} > %s")
+        params.append(int(after))
+
+    for column, value in (filters or {}).items():
+        conditions.append(f"{join_columns(table, [column])} = %s")
+        params.append(int(value))
+
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+
+    query = (f"SELECT {join_columns(table, columns)} FROM {quote_identifier(table)}{where} "
+             f"ORDER BY {quote_identifier(key)} LIMIT %s;")
+
+    return query, params + [limit]
+
+
+def build_search_query(search: str, limit: int, offset: int = 0,
+                       filters: dict = None) -> tuple[str, list]:
+    '''Returns the query and parameters for a page of cases matching a web-style search.
+    Filters are equality conditions on integer id columns of the transcript table.'''
+
+    conditions = ["t.search_vector @@ query"]
+    params = [SNIPPET_OPTIONS, search]
+
+    for column, value in (filters or {}).items():
+        conditions.append(f"t.{join_columns('transcript', [column])} = %s")
+        params.append(int(value))
+
+    return SEARCH_QUERY.format(conditions=" AND ".join(conditions)), params + [limit, offset]
+
+
+def get_page(conn, table: str, columns: list[str], limit: int,
+             after: str = None, filters: dict = None) -> list[RealDictRow]:
+    '''Returns one page of a table ordered by its key, starting after the given key (keyset pagination).
+    Filters are equality conditions on integer id columns of the table.'''
+
+    query, params = build_page_query(table, columns, limit, after, filters)
+
     with conn.cursor() as cur:
 
-        cur.execute(
-            sql.SQL(f"""SELECT * FROM transcript WHERE judge_id = {judge_id} """))
+        cur.execute(query, params)
 
-        cases = cur.fetchall()
+        rows = cur.fetchall()
+
+    return rows
+
+
+def get_next_page_args(args: dict, rows: list, table: str, limit: int):
+    '''Returns the request args for the page after the given rows, or None on the last page.'''
+
+    if len(rows) < limit:
+        return None
+
+    return {**args, 'after': rows[-1][TABLE_KEYS[table]]}
+
+
+def get_search_offset(page: str, limit: int) -> int:
+    '''Returns the number of search results before the given page.'''
+
+    if not page.isnumeric() or int(page) == 0:
+        raise TypeError("Page must be a positive integer.")
+
+    return (int(page) - 1) * limit
+
+
+def get_batch_ids(body, key: str) -> list:
+    '''Returns the unique identifiers listed under the given key of a JSON request body.'''
+
+    if not isinstance(body, dict) or not isinstance(body.get(key), list) or not body[key]:
+        raise ValueError(f"Request body must be JSON with a non-empty list '{key}'.")
+
+    ids = list(dict.fromkeys(body[key]))
+
+    if len(ids) > BATCH_LIMIT:
+        raise ValueError(f"At most {BATCH_LIMIT} {key} can be requested at once.")
+
+    return ids
+
+
+def validate_case_nos(case_nos: list) -> list[str]:
+    '''Checks batch case numbers are strings.'''
+
+    if not all(isinstance(case_no, str) for case_no in case_nos):
+        raise TypeError("Case numbers must be strings.")
+
+    return case_nos
+
+
+def validate_judge_ids(judge_ids: list) -> list[int]:
+    '''Checks batch judge ids are integers, and returns them as unique integers.'''
+
+    if not all(str(judge_id).isnumeric() for judge_id in judge_ids):
+        raise TypeError("Judge ids must be integers.")
+
+    return list(dict.fromkeys(int(judge_id) for judge_id in judge_ids))
+
+
+def get_batch_result(ids: list, found: dict) -> tuple[dict, list]:
+    '''Returns the found record for each requested id (or None), and the ids not found.'''
+
+    return ({id: found.get(id) for id in ids},
+            [id for id in ids if id not in found])
+
+
+def stream_table(conn, table: str, columns: list[str],
+                 batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[RealDictRow]:
+    '''Yields every row of a table ordered by its key.
+    Uses a server-side cursor so only batch_size rows are held in memory at once.'''
+
+    query = sql.SQL("SELECT {} FROM {} ORDER BY {};").format(
+        sql.SQL(", ").join(map(sql.Identifier, columns)),
+        sql.Identifier(table),
+        sql.Identifier(TABLE_KEYS[table]))
+
+    with conn.cursor(name=f"export_{table}") as cur:
+
+        cur.itersize = batch_size
+        cur.execute(query)
+
+        yield from cur
 
-    return cases
 
+def search_cases(conn, search: str, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0,
+                 filters: dict = None) -> list[RealDictRow]:
+    '''Returns a page of cases matching a web-style search of their title, summary and verdict.
+    Cases are ordered by relevance and include a highlighted snippet of the summary.'''
 
-def search_cases(conn, search: str) -> list[RealDictRow]:
-    '''Returns cases whose titles contain a particular substring.'''
+    query, params = build_search_query(search, limit, offset, filters)
 
     with conn.cursor() as cur:
 
-        cur.execute(sql.SQL(
-            "SELECT * FROM transcript WHERE title ILIKE '%{}%'").format(sql.SQL(search)))
+        cur.execute(query, params)
 
         cases = cur.fetchall()
 
@@ -143,7 +457,7 @@ if __name__ == '__main__':
 
     CONN = get_db_connection(ENV)
 
-    result = filter_judges(CONN, {'circuit_id': '1',
-                                  'judge_type_id': '3'})
+    result = get_page(CONN, 'judge', get_fields('judge'), DEFAULT_PAGE_SIZE,
+                      filters={'circuit_id': '1', 'judge_type_id': '3'})
 
     print(result)
@@ -0,0 +1,187 @@
+"""This script tests the response cache in cache.py and the cached decorator in app.py"""
+from unittest.mock import patch, MagicMock
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+import app as api
+from cache import ResponseCache, DataVersion, get_cache_key, make_cache_entry
+
+"""
+Testing ResponseCache
+"""
+
+
+def test_response_cache_returns_cached_value():
+    """Tests that a value is returned for the version it was cached with."""
+
+    cache = ResponseCache(2, 60)
+    cache.set("foo", 1, "bar")
+
+    assert cache.get("foo", 1) == "bar"
+
+
+def test_response_cache_misses_on_new_version():
+    """Tests that a value from an older data version is dropped."""
+
+    cache = ResponseCache(2, 60)
+    cache.set("foo", 1, "bar")
+
+    assert cache.get("foo", 2) is None
+    assert cache.get("foo", 1) is None
+
+
+@patch("cache.monotonic")
+def test_response_cache_expires_after_ttl(mock_time):
+    """Tests that a value is dropped once its TTL has passed."""
+
+    cache = ResponseCache(2, 60)
+    mock_time.return_value = 100
+    cache.set("foo", 1, "bar")
+
+    mock_time.return_value = 159
+    assert cache.get("foo", 1) == "bar"
+
+    mock_time.return_value = 161
+    assert cache.get("foo", 1) is None
+
+
+def test_response_cache_evicts_least_recently_used():
+    """Tests that the least recently read or written entry is evicted when full."""
+
+    cache = ResponseCache(2, 60)
+    cache.set("foo", 1, "foo")
+    cache.set("bar", 1, "bar")
+    cache.get("foo", 1)
+    cache.set("fizz", 1, "fizz")
+
+    assert cache.get("bar", 1) is None
+    assert cache.get("foo", 1) == "foo"
+    assert cache.get("fizz", 1) == "fizz"
+
+
+def test_get_cache_key_ignores_argument_order():
+    """Tests that the same query string args in any order share a key."""
+
+    assert get_cache_key("/judges", MultiDict([("b", "2"), ("a", "1")])) == \
+        get_cache_key("/judges", MultiDict([("a", "1"), ("b", "2")])) == "/judges?a=1&b=2"
+
+
+def test_get_cache_key_includes_host():
+    """Tests that the same route and args on different hosts get different keys."""
+
+    assert get_cache_key("http://foo/judges", MultiDict([("a", "1")])) != \
+        get_cache_key("https://bar/judges", MultiDict([("a", "1")]))
+
+
+def test_make_cache_entry_has_stable_etag():
+    """Tests that the same body always gets the same ETag."""
+
+    assert make_cache_entry(b"foo", "application/json") == \
+        make_cache_entry(b"foo", "application/json")
+    assert make_cache_entry(b"foo", "application/json")[2] != \
+        make_cache_entry(b"bar", "application/json")[2]
+
+
+"""
+Testing DataVersion
+"""
+
+
+def fake_get_conn(version: int) -> MagicMock:
+    """Returns a get_conn function whose connection reads the given data version."""
+
+    conn = MagicMock()
+    conn.cursor.return_value.__enter__.return_value.fetchone.return_value = {'version': version}
+    return MagicMock(return_value=conn)
+
+
+@patch("cache.monotonic")
+def test_data_version_reads_once_per_interval(mock_time):
+    """Tests that the database is only read again once the interval has passed."""
+
+    data_version = DataVersion(5)
+    get_conn = fake_get_conn(3)
+
+    mock_time.return_value = 100
+    assert data_version.get(get_conn) == 3
+    mock_time.return_value = 104
+    assert data_version.get(get_conn) == 3
+    assert get_conn.call_count == 1
+
+    mock_time.return_value = 106
+    data_version.get(get_conn)
+    assert get_conn.call_count == 2
+
+
+def test_data_version_defaults_to_zero():
+    """Tests that a missing data_version row reads as version 0."""
+
+    get_conn = fake_get_conn(None)
+    get_conn.return_value.cursor.return_value.__enter__.return_value.fetchone.return_value = None
+
+    assert DataVersion(5).get(get_conn) == 0
+
+
+"""
+Testing the cached decorator
+"""
+
+
+@pytest.fixture
+def client():
+    """Returns a test client whose circuits view counts its calls, with an empty cache."""
+
+    api.CACHE.clear()
+    with patch.object(api.DATA_VERSION, "get", return_value=1), \
+            patch("app.get_conn"), \
+            patch("app.get_table", return_value=[{'circuit_id': 1, 'name': 'foo'}]) as mock_table:
+        yield api.app.test_client(), mock_table
+
+
+def test_cached_serves_repeat_requests_from_cache(client):
+    """Tests that a repeated request does not call the view again."""
+
+    test_client, mock_table = client
+
+    first = test_client.get("/circuits")
+    second = test_client.get("/circuits")
+
+    assert mock_table.call_count == 1
+    assert first.get_data() == second.get_data()
+    assert first.headers["ETag"] == second.headers["ETag"]
+
+
+def test_cached_keeps_hosts_apart(client):
+    """Tests that a response cached for one host is not served to another,
+    as its links are absolute urls."""
+
+    test_client, mock_table = client
+
+    test_client.get("/circuits", base_url="http://foo")
+    test_client.get("/circuits", base_url="https://bar")
+
+    assert mock_table.call_count == 2
+
+
+def test_cached_returns_not_modified_for_matching_etag(client):
+    """Tests that a request sending back the ETag gets a 304 with no body."""
+
+    test_client, _ = client
+
+    etag = test_client.get("/circuits").headers["ETag"]
+    response = test_client.get("/circuits", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.get_data() == b""
+
+
+def test_cached_does_not_cache_errors(client):
+    """Tests that unsuccessful responses are not cached."""
+
+    test_client, mock_table = client
+    mock_table.return_value = []
+
+    assert test_client.get("/circuits").status_code == 404
+    assert test_client.get("/circuits").status_code == 404
+    assert mock_table.call_count == 2
@@ -0,0 +1,105 @@
+"""This script tests functions in the export.py file"""
+from datetime import date
+import gzip
+import json
+
+import pytest
+
+from export import batch_rows, encode_ndjson, encode_csv, gzip_chunks
+
+ROWS = [{'case_no': f'CL-{i}', 'title': f'Foo, Bar {i}', 'transcript_date': date(2024, 1, i)}
+        for i in range(1, 6)]
+
+"""
+Testing batch_rows
+"""
+
+
+@pytest.mark.parametrize("rows, batch_size, sizes", [(5, 2, [2, 2, 1]),
+                                                     (4, 2, [2, 2]),
+                                                     (1, 2, [1]),
+                                                     (3, 5, [3]),
+                                                     (0, 2, [])])
+def test_batch_rows_sizes(rows, batch_size, sizes):
+    """Tests that batches are full except the last, and no empty batch is yielded."""
+
+    batches = list(batch_rows(range(rows), batch_size))
+
+    assert [len(batch) for batch in batches] == sizes
+    assert [row for batch in batches for row in batch] == list(range(rows))
+
+
+"""
+Testing encode_ndjson
+"""
+
+
+def test_encode_ndjson_yields_one_chunk_per_batch():
+    """Tests that each batch of rows is one chunk of JSON lines."""
+
+    chunks = list(encode_ndjson(ROWS, batch_size=2))
+
+    assert len(chunks) == 3
+    assert chunks[0].decode().count('\n') == 2
+
+
+def test_encode_ndjson_lines_are_rows():
+    """Tests that every line decodes to its row, with dates as strings."""
+
+    lines = b''.join(encode_ndjson(ROWS, batch_size=2)).decode().splitlines()
+
+    assert [json.loads(line) for line in lines] == [
+        {**row, 'transcript_date': str(row['transcript_date'])} for row in ROWS]
+
+
+"""
+Testing encode_csv
+"""
+
+
+def test_encode_csv_header_then_rows():
+    """Tests that the header is the first chunk, followed by a chunk per batch."""
+
+    chunks = list(encode_csv(ROWS, ['case_no', 'title'], batch_size=2))
+
+    assert chunks[0] == b'case_no,title\r\n'
+    assert len(chunks) == 4
+
+
+def test_encode_csv_rows_in_column_order():
+    """Tests that rows follow the header's column order and are quoted where needed."""
+
+    lines = b''.join(encode_csv(ROWS[:2], ['title', 'case_no'])).decode().splitlines()
+
+    assert lines == ['title,case_no', '"Foo, Bar 1",CL-1', '"Foo, Bar 2",CL-2']
+
+
+def test_encode_csv_header_only_for_no_rows():
+    """Tests that an empty export is just the header."""
+
+    assert list(encode_csv([], ['case_no'])) == [b'case_no\r\n']
+
+
+"""
+Testing gzip_chunks
+"""
+
+
+def test_gzip_chunks_decompresses_to_payload():
+    """Tests that the concatenated chunks are one gzip stream of the whole payload."""
+
+    chunks = list(encode_ndjson(ROWS, batch_size=2))
+
+    assert gzip.decompress(b''.join(gzip_chunks(chunks))) == b''.join(chunks)
+
+
+def test_gzip_chunks_flushes_each_chunk():
+    """Tests that a compressed chunk is yielded for every input chunk, plus the trailer."""
+
+    assert len(list(gzip_chunks([b'foo', b'bar']))) == 3
+
+
+def test_gzip_chunks_with_no_chunks():
+    """Tests that an empty stream still compresses to a valid empty gzip stream."""
+
+    assert gzip.decompress(b''.join(gzip_chunks([]))) == b''
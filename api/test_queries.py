@@ -0,0 +1,174 @@
+"""This script tests the query builders and argument checks shared by app.py and async_app.py"""
+from unittest.mock import patch
+
+import pytest
+
+import app as api
+from queries import (build_page_query, build_search_query, get_next_page_args, get_search_offset, get_batch_ids,
+                     validate_judge_ids, get_batch_result, get_stats_query, join_columns, BATCH_LIMIT)
+
+"""
+Testing build_page_query
+"""
+
+
+def test_build_page_query_without_filters():
+    """Tests that the first page has no conditions and the limit is the only parameter."""
+
+    query, params = build_page_query('judge', ['judge_id', 'name'], 10)
+
+    assert query == 'SELECT "judge_id", "name" FROM "judge" ORDER BY "judge_id" LIMIT %s;'
+    assert params == [10]
+
+
+def test_build_page_query_with_after_and_filters():
+    """Tests that the cursor and filters become conditions with integer parameters."""
+
+    query, params = build_page_query('judge', ['judge_id'], 10, '5',
+                                     {'circuit_id': '1', 'judge_type_id': '3'})
+
+    assert 'WHERE "judge_id" > %s AND "circuit_id" = %s AND "judge_type_id" = %s' in query
+    assert params == [5, 1, 3, 10]
+
+
+def test_build_page_query_rejects_non_integer_after():
+    """Tests that a non-numeric cursor raises a TypeError."""
+
+    with pytest.raises(TypeError):
+        build_page_query('transcript', ['transcript_id'], 10, 'foo')
+
+
+@pytest.mark.parametrize("columns, filters", [(['judge_id', 'foo'], None),
+                                              (['judge_id'], {'bar; DROP TABLE judge': '1'})])
+def test_build_page_query_rejects_unknown_columns(columns, filters):
+    """Tests that columns the table does not have are never put in the query."""
+
+    with pytest.raises(ValueError):
+        build_page_query('judge', columns, 10, filters=filters)
+
+
+"""
+Testing build_search_query
+"""
+
+
+def test_build_search_query_without_filters():
+    """Tests that only the search condition is applied, with the page as the last parameters."""
+
+    query, params = build_search_query('fraud', 20, 40)
+
+    assert 'WHERE t.search_vector @@ query\n' in query
+    assert params[1:] == ['fraud', 20, 40]
+
+
+def test_build_search_query_with_judge_filter():
+    """Tests that filters are added to the search condition with integer parameters."""
+
+    query, params = build_search_query('fraud', 20, 0, {'judge_id': '3'})
+
+    assert 'WHERE t.search_vector @@ query AND t."judge_id" = %s' in query
+    assert params[1:] == ['fraud', 3, 20, 0]
+
+
+def test_cases_search_keeps_judge_filter():
+    """Tests that searching the cases of a judge applies both the search and the judge filter."""
+
+    with patch("app.get_conn"), \
+            patch("app.search_cases", return_value=[{'case_no': 'foo'}]) as mock_search:
+        response = api.app.test_client().get("/cases?judge_id=3&search=fraud")
+
+    assert response.status_code == 200
+    assert mock_search.call_args.args[1] == 'fraud'
+    assert mock_search.call_args.args[4] == {'judge_id': '3'}
+
+
+def test_join_columns_quotes_columns():
+    """Tests that columns are quoted and comma separated."""
+
+    assert join_columns('judge', ['judge_id', 'name']) == '"judge_id", "name"'
+
+
+def test_get_stats_query_rejects_unknown_stat():
+    """Tests that only the statistics in STATS_VIEWS can be queried."""
+
+    with pytest.raises(ValueError):
+        get_stats_query('foo')
+
+
+"""
+Testing pagination arguments
+"""
+
+
+def test_get_next_page_args_on_full_page():
+    """Tests that a full page links to the rows after its last key."""
+
+    rows = [{'judge_id': 1}, {'judge_id': 2}]
+
+    assert get_next_page_args({'limit': '2'}, rows, 'judge', 2) == {'limit': '2', 'after': 2}
+
+
+def test_get_next_page_args_on_last_page():
+    """Tests that a page shorter than the limit has no next page."""
+
+    assert get_next_page_args({}, [{'judge_id': 1}], 'judge', 2) is None
+
+
+@pytest.mark.parametrize("page, offset", [('1', 0), ('2', 20), ('5', 80)])
+def test_get_search_offset(page, offset):
+    """Tests that search pages start after the results of the previous pages."""
+
+    assert get_search_offset(page, 20) == offset
+
+
+@pytest.mark.parametrize("page", ['0', 'foo', '-1'])
+def test_get_search_offset_rejects_invalid_pages(page):
+    """Tests that pages must be positive integers."""
+
+    with pytest.raises(TypeError):
+        get_search_offset(page, 20)
+
+
+"""
+Testing batch arguments
+"""
+
+
+def test_get_batch_ids_removes_duplicates_in_order():
+    """Tests that repeated ids are only returned once, in request order."""
+
+    assert get_batch_ids({'ids': [3, 1, 3, 2]}, 'ids') == [3, 1, 2]
+
+
+@pytest.mark.parametrize("body", [None, [], {'ids': []}, {'ids': 'foo'}, {'other': [1]}])
+def test_get_batch_ids_rejects_invalid_bodies(body):
+    """Tests that the body must have a non-empty list under the key."""
+
+    with pytest.raises(ValueError):
+        get_batch_ids(body, 'ids')
+
+
+def test_get_batch_ids_rejects_too_many_ids():
+    """Tests that at most BATCH_LIMIT ids can be requested."""
+
+    with pytest.raises(ValueError):
+        get_batch_ids({'ids': list(range(BATCH_LIMIT + 1))}, 'ids')
+
+
+def test_validate_judge_ids_returns_unique_integers():
+    """Tests that numeric strings and integers are returned as unique integers."""
+
+    assert validate_judge_ids([1, '1', '2']) == [1, 2]
+
+
+def test_validate_judge_ids_rejects_non_integers():
+    """Tests that non-numeric ids raise a TypeError."""
+
+    with pytest.raises(TypeError):
+        validate_judge_ids([1, 'foo'])
+
+
+def test_get_batch_result_lists_missing_ids():
+    """Tests that every requested id is returned, with None and a missing entry for unknown ids."""
+
+    assert get_batch_result([1, 2], {1: 'foo'}) == ({1: 'foo', 2: None}, [2])
@@ -0,0 +1,79 @@
+'''Times how long each dashboard page takes to start, using Streamlit's headless app tester.
+Each page runs in a fresh interpreter, so it only pays for its own imports. The cold run
+includes imports, the pool's first connection and empty caches; the warm run is a rerun
+of the same session, served from the caches.
+
+Needs the dashboard's .env database settings, e.g. a local database seeded with
+database/seed_synthetic.py.'''
+
+from argparse import ArgumentParser
+from os import path
+from time import perf_counter
+import json
+import subprocess
+import sys
+
+
+DASHBOARD_DIR = path.dirname(path.abspath(__file__))
+
+PAGES = {"Searches": "streamlit_app.py",
+         "Charts": "pages/1_Charts.py"}
+
+
+def time_page(page: str, timeout: float) -> dict:
+    '''Runs a page twice in this interpreter and returns its startup statistics.'''
+
+    from streamlit.testing.v1 import AppTest
+
+    modules_before = len(sys.modules)
+
+    start = perf_counter()
+    app = AppTest.from_file(path.join(DASHBOARD_DIR, page), default_timeout=timeout)
+    app.run()
+    cold = perf_counter() - start
+
+    start = perf_counter()
+    app.run()
+    warm = perf_counter() - start
+
+    return {"cold": cold * 1000,
+            "warm": warm * 1000,
+            "modules": len(sys.modules) - modules_before,
+            "errors": len(app.exception)}
+
+
+def time_page_in_subprocess(page: str, timeout: float) -> dict:
+    '''Returns the startup statistics of a page, timed in a fresh interpreter.'''
+
+    result = subprocess.run([sys.executable, __file__, "--page", page, "--timeout", str(timeout)],
+                            cwd=DASHBOARD_DIR, capture_output=True, text=True, check=True)
+
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(pages: dict[str, str], repeats: int, timeout: float) -> None:
+    '''Times each page and prints a summary table of the best runs.'''
+
+    print(f"{'page':<12}{'cold ms':>10}{'warm ms':>10}{'modules':>10}{'errors':>8}")
+    for name, page in pages.items():
+        runs = [time_page_in_subprocess(page, timeout) for _ in range(repeats)]
+        best = min(runs, key=lambda run: run["cold"])
+        print(f"{name:<12}{best['cold']:>10.0f}{min(run['warm'] for run in runs):>10.0f}"
+              f"{best['modules']:>10}{best['errors']:>8}")
+
+
+if __name__ == "__main__":
+
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="fresh interpreters started for each page")
+    parser.add_argument("--timeout", type=float, default=60,
+                        help="seconds each page run may take")
+    parser.add_argument("--page", default=None,
+                        help="time a single page file in this interpreter and print JSON")
+    args = parser.parse_args()
+
+    if args.page:
+        print(json.dumps(time_page(args.page, args.timeout)))
+    else:
+        main(PAGES, args.repeats, args.timeout)
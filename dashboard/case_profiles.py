@@ -1,75 +1,70 @@
 """Python script for extracting information for each case from an RDS"""
 
-from os import environ as ENV
-
 import streamlit as st
-from psycopg2 import connect
-from psycopg2.extras import RealDictCursor
-
-
-def get_db_connection(config) -> connect:
-    """Returns db connection."""
-
-    return connect(dbname=config["DB_NAME"],
-                   user=config["DB_USER"],
-                   password=config["DB_PASSWORD"],
-                   host=config["DB_HOST"],
-                   port=config["DB_PORT"],
-                   cursor_factory=RealDictCursor)
-
-
-def get_case_query() -> st.text_input:
-    """Returns a Streamlit input box that catches a queried case by name or number"""
-
-    return st.text_input(label="case search",
-                         label_visibility="hidden",
-                         placeholder="Enter a case name/no.:")
-
-
-def get_case_information_by_name(conn, case_name):
-    """Returns a dictionary of case details found by case name."""
-
-    try:
-        with conn.cursor() as cur:
-            query = """
-                    SELECT t.title, t.transcript_date, t.verdict, t.summary, j.name
-                    FROM transcript AS t
-                    LEFT JOIN judge AS j
-                    ON t.judge_id = j.judge_id
-                    WHERE t.title ILIKE %s
-                    """
-            cur.execute(query, ('%' + case_name + '%',))
-            rows = cur.fetchone()
-
-        return rows
-    except Exception as e:
-        st.error(f"Error fetching case information from database: {e}")
-
-
-def get_case_information_by_case_number(conn, case_number):
-    """Returns a dictionary of case details found by case number."""
-
-    try:
-        with conn.cursor() as cur:
-            query = """
-                    SELECT t.title, t.transcript_date, t.summary, t.verdict, j.name
-                    FROM transcript AS t
-                    LEFT JOIN judge AS j
-                    ON t.judge_id = j.judge_id
-                    WHERE t.case_no = %s
-                    """
-            cur.execute(query, (case_number,))
-            rows = cur.fetchone()
-
-        return rows
-    except Exception as e:
-        st.error(f"Error fetching case information from database: {e}")
-
-
-def find_case_query_type(case_query):
-    """Returns a bool if the case query is name (true) or number (false)"""
-
-    return all(str.isalpha(split) for split in case_query.split())
+from streamlit_searchbox import st_searchbox
+
+from dashboard_db import get_cursor, get_data_version
+from selections import (escape_like,
+                        MIN_SEARCH_LENGTH,
+                        SEARCH_LIMIT,
+                        SEARCH_DEBOUNCE,
+                        SEARCH_CACHE_ENTRIES)
+
+
+@st.cache_data(max_entries=SEARCH_CACHE_ENTRIES, show_spinner=False)
+def search_cases(version: int, term: str) -> list[tuple[str, int]]:
+    """Returns the top cases whose case number starts with, or title contains, the search term,
+    as (label, transcript_id) options. Case number matches come first.
+    Cached per term until the data version changes."""
+
+    term = term.strip()
+    if len(term) < MIN_SEARCH_LENGTH:
+        return []
+
+    with get_cursor() as cur:
+        query = """
+                SELECT transcript_id, case_no, title
+                FROM transcript
+                WHERE case_no LIKE %(prefix)s
+                    OR title ILIKE %(contains)s
+                ORDER BY case_no LIKE %(prefix)s DESC, similarity(title, %(term)s) DESC, transcript_id
+                LIMIT %(limit)s
+                """
+        cur.execute(query, {"prefix": escape_like(term.upper()) + "%",
+                            "contains": "%" + escape_like(term) + "%",
+                            "term": term,
+                            "limit": SEARCH_LIMIT})
+        rows = cur.fetchall()
+
+    return [(f"{row['case_no']}  {row['title']}", row["transcript_id"]) for row in rows]
+
+
+def get_case_selection(key: str):
+    """Returns a search-as-you-type box for cases by name or number.
+    Returns the transcript_id of the chosen case, or None."""
+
+    return st_searchbox(lambda term: search_cases(get_data_version(), term),
+                        key=key,
+                        placeholder="Enter a case name/no.:",
+                        debounce=SEARCH_DEBOUNCE)
+
+
+@st.cache_data(max_entries=SEARCH_CACHE_ENTRIES, show_spinner=False)
+def get_case_information(version: int, transcript_id: int) -> dict:
+    """Returns a dictionary of case details, cached until the data version changes."""
+
+    with get_cursor() as cur:
+        query = """
+                SELECT t.case_no, t.title, t.transcript_date, t.summary, t.verdict, j.name
+                FROM transcript AS t
+                LEFT JOIN judge AS j
+                ON t.judge_id = j.judge_id
+                WHERE t.transcript_id = %s
+                """
+        cur.execute(query, (transcript_id,))
+        row = cur.fetchone()
+
+    return dict(row) if row else None
 
 
 if __name__ == "__main__":
@@ -1,121 +1,154 @@
 '''This file contains charts for the streamlit dashboard.'''
 
+from io import BytesIO
 from os import environ as ENV
+import logging
 import streamlit as st
 import altair as alt
-from dotenv import load_dotenv
-import matplotlib.pyplot as plt
 import pandas as pd
-from psycopg2 import connect
-from psycopg2.extras import RealDictCursor
-from pywaffle import Waffle
-from wordcloud import WordCloud, STOPWORDS
-
-
-def get_db_connection(config) -> connect:
-    """Returns db connection."""
-
-    return connect(dbname=config["DB_NAME"],
-                   user=config["DB_USER"],
-                   password=config["DB_PASSWORD"],
-                   host=config["DB_HOST"],
-                   port=config["DB_PORT"],
-                   cursor_factory=RealDictCursor)
-
-
-def get_data_from_db(conn: connect) -> pd.DataFrame:
-    """Returns all data from the database as a pd.DF."""
-
-    with conn.cursor() as cur:
-        query = """
-                SELECT t.transcript_id, t.case_no, t.transcript_date, t.title, t.summary, t.verdict,
-                    j.judge_id, j.name AS judge, j.appointed, j.gender,
-                    jt.judge_type_id AS type_id, jt.type_name,
-                    c.circuit_id, c.name AS circuit_name
-                FROM transcript AS t
-                JOIN judge AS j
-                    ON t.judge_id = j.judge_id
-                JOIN judge_type AS jt
-                    ON j.judge_type_id = jt.judge_type_id
-                JOIN circuit AS c
-                    ON j.circuit_id = c.circuit_id
-                """
-        cur.execute(query)
-        rows = cur.fetchall()
 
-    df = pd.DataFrame(rows)
+from dashboard_db import get_cursor, get_data_version, CACHE_MAX_ENTRIES
+
+
+# Chart specs, data included, larger than this many bytes are logged as a warning
+MAX_CHART_BYTES = int(ENV.get("MAX_CHART_BYTES", 100_000))
+
+# Filter keys and the conditions they add to the filtered aggregates query
+FILTER_CONDITIONS = {"judge_id": "j.judge_id = %s",
+                     "circuit_name": "c.name = ANY(%s)",
+                     "gender": "j.gender = %s",
+                     "type_name": "jt.type_name = %s"}
+
+
+def build_filter_query(filters: dict) -> tuple[str, list]:
+    '''Returns a parameterised query and its parameters for the judge gender and verdict counts
+    of the transcripts matching the filters. Takes in a dictionary with keys type_name,
+    judge_id, circuit_name, gender, and appointed. Empty filters are ignored.'''
+
+    conditions = []
+    params = []
+
+    for key, condition in FILTER_CONDITIONS.items():
+        if filters.get(key):
+            conditions.append(condition)
+            params.append(list(filters[key]) if key == "circuit_name" else filters[key])
+
+    appointed = filters.get("appointed")
+    if appointed:
+        conditions.append("j.appointed >= %s")
+        params.append(appointed[0])
+        if len(appointed) > 1:
+            conditions.append("j.appointed <= %s")
+            params.append(appointed[1])
 
-    return df
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
 
+    query = f"""
+            SELECT j.gender, COUNT(*) AS count,
+                COUNT(*) FILTER (WHERE t.outcome = 'claimant') AS claimant,
+                COUNT(*) FILTER (WHERE t.outcome = 'defendant') AS defendant
+            FROM transcript AS t
+            JOIN judge AS j
+                ON t.judge_id = j.judge_id
+            JOIN judge_type AS jt
+                ON j.judge_type_id = jt.judge_type_id
+            JOIN circuit AS c
+                ON j.circuit_id = c.circuit_id
+            {where}
+            GROUP BY j.gender
+            ORDER BY j.gender;
+            """
 
-def get_filtered_data(data: pd.DataFrame, filters: dict):
-    '''Filters a dataframe. Takes in a dictionary with keys type_id, judge_id, 
-    circuit_id, gender, and appointed.'''
+    return query, params
 
-    for key in filters.keys():
-        if filters[key]:
-            if key == "circuit_id" and len(data) != 0:
-                data = data[data[key].isin(filters[key])]
-            elif key == "appointed" and len(data) != 0:
-                data = data[data[key].apply(
-                    lambda x: x >= filters[key][0] and x <= filters[key][1])]
-            elif len(data) != 0:
-                data = data[data[key] == filters[key]]
 
-    if len(data) == 0:
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def get_filtered_aggregates(version: int, filters: dict):
+    '''Returns the transcript, claimant and defendant counts per judge gender
+    for the transcripts matching the filters, aggregated in the database.
+    Cached per filter until the data version changes.'''
+
+    query, params = build_filter_query(filters)
+
+    with get_cursor() as cur:
+        cur.execute(query, params)
+        rows = cur.fetchall()
+
+    if not rows:
         return "No data for chosen filters."
 
-    return data
+    return pd.DataFrame(rows)
 
 
-def get_judges_appointed(conn: connect) -> pd.DataFrame:
-    '''Returns the judge counts grouped by gender and appointment.'''
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def get_judges_appointed(version: int) -> pd.DataFrame:
+    '''Returns the judge counts grouped by gender and appointment.
+    The columns are set even if there are no judges. Cached until the data version changes.'''
 
     query = """
                 SELECT appointed, gender, count(judge_id) FROM judge
                 GROUP BY appointed, gender;
                 """
-    with conn.cursor() as cur:
+    with get_cursor() as cur:
         cur.execute(query)
         rows = cur.fetchall()
 
-    return pd.DataFrame(rows)
+    return pd.DataFrame(rows, columns=["appointed", "gender", "count"])
 
 
-def get_cases(conn: connect) -> pd.DataFrame:
-    '''Returns the case number and date.'''
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def get_cases(version: int) -> pd.DataFrame:
+    '''Returns the case counts grouped by date.
+    The columns are set even if there are no cases. Cached until the data version changes.'''
 
     query = """
                 SELECT COUNT(case_no), transcript_date FROM transcript
                 GROUP BY transcript_date;
                 """
-    with conn.cursor() as cur:
+    with get_cursor() as cur:
         cur.execute(query)
         rows = cur.fetchall()
 
-    return pd.DataFrame(rows)
+    return pd.DataFrame(rows, columns=["count", "transcript_date"])
+
+
+def check_chart_size(chart: alt.Chart, name: str) -> alt.Chart:
+    '''Logs a warning if the chart's spec, including its data, is larger than MAX_CHART_BYTES,
+    as charts should be passed aggregated rows rather than the raw data. Returns the chart.'''
+
+    size = len(chart.to_json())
 
+    if size > MAX_CHART_BYTES:
+        logging.warning("The %s chart spec is %d bytes, over the %d byte limit.",
+                        name, size, MAX_CHART_BYTES)
 
-def get_gender_donut_chart(data: pd.DataFrame):
+    return chart
+
+
+def get_gender_donut_chart(aggregates: pd.DataFrame):
     '''Returns a donut chart showing judge genders.'''
 
-    genders = data.value_counts("gender").reset_index()
+    genders = aggregates[["gender", "count"]]
 
     chart = alt.Chart(genders).mark_arc(innerRadius=15).encode(
         theta='count:Q',
         color=alt.Color('gender:N').title('Gender')
     ).properties(width=225, height=225)
 
-    return chart
+    return check_chart_size(chart, "gender donut")
 
 
-def get_waffle_chart(data: pd.DataFrame):
+def get_waffle_chart(aggregates: pd.DataFrame):
     '''Returns a waffle chart that shows verdicts which ruled in favour of claimant vs defendant.'''
 
-    claimants = data[data['verdict'].str.lower().str.contains('claimant')]
-    defendants = data[data['verdict'].str.lower().str.contains('defendant')]
+    # Imported here, so pages without a waffle chart don't load matplotlib
+    import matplotlib.pyplot as plt
+    from pywaffle import Waffle
+
+    claimants = int(aggregates['claimant'].sum())
+    defendants = int(aggregates['defendant'].sum())
 
-    waffle_rows = (len(claimants) + len(defendants)) // 50
+    waffle_rows = (claimants + defendants) // 50
 
     if waffle_rows == 0:
         waffle_rows = 1
@@ -124,7 +157,7 @@ def get_waffle_chart(data: pd.DataFrame):
         FigureClass=Waffle,
         rows=waffle_rows,
         figsize=(20, 2),
-        values={'Claimant': len(claimants), 'Defendant': len(defendants)},
+        values={'Claimant': claimants, 'Defendant': defendants},
         colors=['#5e67c7', '#e26571'],
         facecolor='#0F1117',
     )
@@ -132,12 +165,11 @@ def get_waffle_chart(data: pd.DataFrame):
     return fig
 
 
-def get_waffle_metrics(data: pd.DataFrame):
+def get_waffle_metrics(aggregates: pd.DataFrame):
     """Returns a metric that shows the verdicts which ruled in favour of claimant vs defendant"""
 
-    claimants = len(data[data['verdict'].str.lower().str.contains('claimant')])
-    defendants = len(
-        data[data['verdict'].str.lower().str.contains('defendant')])
+    claimants = int(aggregates['claimant'].sum())
+    defendants = int(aggregates['defendant'].sum())
 
     claimant_wins = str(
         round(claimants / (claimants + defendants), 1)*100) + '%'
@@ -147,33 +179,39 @@ def get_waffle_metrics(data: pd.DataFrame):
     return claimant_wins, defendant_wins
 
 
-def get_judge_count_line_chart(conn: connect) -> alt.Chart:
-    '''Returns the line graph for judge appointment count over time.'''
+def get_yearly_counts(data: pd.DataFrame, date_column: str, group_column: str = None) -> pd.DataFrame:
+    '''Returns the total of the count column per year (and group), from the first to the last year
+    in the data, i.e. the number of judges or cases rather than the number of dates they fall on.
+    Years with no rows are filled with zero for every group, so lines have no gaps.
+    Dates are replaced by the first day of their year.'''
 
-    data = get_judges_appointed(conn)
-    data["appointed"] = pd.to_datetime(data["appointed"])
-    judge_count = data.set_index("appointed")
+    data = data.dropna(subset=[date_column])
+    if data.empty:
+        return pd.DataFrame(columns=[group_column, date_column, "count"] if group_column
+                            else [date_column, "count"])
 
-    judge_count = judge_count.groupby(
-        ['gender', pd.Grouper(freq='YE')]).count().reset_index()
+    years = pd.to_datetime(data[date_column]).dt.year.rename(date_column)
+    all_years = range(years.min(), years.max() + 1)
 
-    # Adding counts for years that don't have values
-    for i in range(1999, 2025):
+    if group_column:
+        counts = data.groupby([data[group_column], years])["count"].sum()
+        grid = pd.MultiIndex.from_product([counts.index.levels[0], all_years],
+                                          names=[group_column, date_column])
+    else:
+        counts = data.groupby(years)["count"].sum()
+        grid = pd.Index(all_years, name=date_column)
 
-        if not ((judge_count['gender'] == "M") & (judge_count['appointed'] == pd.Timestamp(year=i, month=12, day=31))).any():
-            row = pd.DataFrame({"gender": "M", "appointed": pd.Timestamp(
-                year=i, month=12, day=31), "count": 0}, index=[0])
-            judge_count = pd.concat([judge_count, row], ignore_index=True)
+    counts = counts.reindex(grid, fill_value=0).reset_index()
+    counts[date_column] = pd.to_datetime(counts[date_column].astype(str), format="%Y")
 
-        if not ((judge_count['gender'] == "F") & (judge_count['appointed'] == pd.Timestamp(year=i, month=12, day=31))).any():
-            row = pd.DataFrame({"gender": "F", "appointed": pd.Timestamp(
-                year=i, month=12, day=31), "count": 0}, index=[0])
-            judge_count = pd.concat([judge_count, row], ignore_index=True)
+    return counts
 
-        if not ((judge_count['gender'] == "X") & (judge_count['appointed'] == pd.Timestamp(year=i, month=12, day=31))).any():
-            row = pd.DataFrame({"gender": "X", "appointed": pd.Timestamp(
-                year=i, month=12, day=31), "count": 0}, index=[0])
-            judge_count = pd.concat([judge_count, row], ignore_index=True)
+
+def get_judge_count_line_chart() -> alt.Chart:
+    '''Returns the line graph for judge appointment count over time.'''
+
+    data = get_judges_appointed(get_data_version())
+    judge_count = get_yearly_counts(data, "appointed", "gender")
 
     chart = alt.Chart(judge_count).mark_line().encode(
         x=alt.X("appointed", title="Year of Appointment"),
@@ -181,98 +219,117 @@ def get_judge_count_line_chart(conn: connect) -> alt.Chart:
         color=alt.Color('gender:N', title='Gender')
     )
 
-    return chart
+    return check_chart_size(chart, "judge count")
 
 
-def get_case_count_line_chart(conn: connect) -> alt.Chart:
+def get_case_count_line_chart() -> alt.Chart:
     '''Returns the line graph for case count over time.'''
 
-    data = get_cases(conn)
-
-    data["transcript_date"] = pd.to_datetime(data["transcript_date"])
-    case_count = data.set_index("transcript_date")
-
-    case_count = case_count.groupby(
-        [pd.Grouper(freq='YE')]).count().reset_index()
+    data = get_cases(get_data_version())
+    case_count = get_yearly_counts(data, "transcript_date")
 
     chart = alt.Chart(case_count).mark_line().encode(
-        x=alt.X("transcript_date", title="Month of Case"),
+        x=alt.X("transcript_date", title="Year of Case"),
         y=alt.Y("count", title="Number of Cases"),
     )
 
-    return chart
+    return check_chart_size(chart, "case count")
+
+
+# Word cloud filters, and the condition each puts on the transcripts counted
+WORD_CLOUD_FILTERS = {"case": "t.case_no = %s",
+                      "judge": "t.judge_id = %s",
+                      "circuit": "c.name = %s"}
+
+WORD_CLOUD_MAX_WORDS = 50
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def get_term_frequencies(version: int, filter_by: str, value) -> dict[str, int]:
+    """Returns the most frequent summary terms of a case, judge or circuit,
+    summed from the term counts stored for each transcript at load time."""
+
+    query = f"""
+            SELECT tt.term, SUM(tt.count)::INT AS count
+            FROM transcript_term AS tt
+            JOIN transcript AS t
+                ON tt.transcript_id = t.transcript_id
+            JOIN judge AS j
+                ON t.judge_id = j.judge_id
+            LEFT JOIN circuit AS c
+                ON j.circuit_id = c.circuit_id
+            WHERE {WORD_CLOUD_FILTERS[filter_by]}
+            GROUP BY tt.term
+            ORDER BY count DESC, tt.term
+            LIMIT %s
+            """
+    with get_cursor() as cur:
+        cur.execute(query, [value, WORD_CLOUD_MAX_WORDS])
+        rows = cur.fetchall()
 
+    return {row["term"]: row["count"] for row in rows}
 
-def generate_word_cloud(summary_texts):
-    """Generates the word cloud itself with the 
+
+def generate_word_cloud(frequencies: dict[str, int]) -> "WordCloud":
+    """Generates the word cloud itself with the
     correct design."""
+
+    # Imported here, so only pages that draw word clouds load it
+    from wordcloud import WordCloud
+
     background_color = '#0e1117'
-    combined_text = ' '.join(summary_texts)
     word_cloud = WordCloud(width=800, height=400, background_color=background_color,
-                           stopwords=STOPWORDS, contour_width=0,
-                           max_font_size=80, min_font_size=10,
-                           relative_scaling=0.5, random_state=42, max_words=50, colormap='Pastel1').generate(combined_text)
+                           contour_width=0, max_font_size=80, min_font_size=10,
+                           relative_scaling=0.5, random_state=42, max_words=WORD_CLOUD_MAX_WORDS,
+                           colormap='Pastel1').generate_from_frequencies(frequencies)
     return word_cloud
 
 
-def get_summary_texts_from_db(conn, case_no):
-    """Gets the summary from the transcripts and 
-    adds it to a list."""
-    summary_texts = []
-    try:
-        with conn.cursor() as cur:
-            query = """
-                    SELECT summary FROM transcript WHERE case_no = %s
-                    """
-            cur.execute(query, (case_no,))
-            rows = cur.fetchall()
-            for row in rows:
-                summary_text = row.get('summary')
-                if summary_text:
-                    summary_texts.append(summary_text)
-            return summary_texts
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def get_word_cloud_image(version: int, filter_by: str, value) -> bytes:
+    """Returns the word cloud of a case, judge or circuit as a PNG, or None if it has no terms.
+    Cached per filter until the data version changes."""
 
-    except Exception as e:
-        st.error(f"Error fetching summary texts from database: {e}")
-        return summary_texts
+    frequencies = get_term_frequencies(version, filter_by, value)
+    if not frequencies:
+        return None
 
+    image = BytesIO()
+    generate_word_cloud(frequencies).to_image().save(image, format="PNG")
 
-def standardise_verdicts(verdict: str) -> str:
-    '''Standardises a verdict to return either 'Claimant' or 'Defendant'.'''
+    return image.getvalue()
 
-    if 'claimant' in verdict.lower():
-        return 'Claimant'
 
-    if 'defendant' in verdict.lower():
-        return 'Defendant'
+def get_verdict_counts(data: pd.DataFrame) -> pd.DataFrame:
+    '''Returns the number of cases per circuit and verdict, without unknown verdicts.
+    The data is shared between sessions, so it is not modified.'''
 
-    return None
+    data = data.loc[(data['circuit_id'] != 1) & (data['outcome'] != 'unknown'),
+                    ['circuit_name', 'outcome']]
 
+    counts = data.groupby(['circuit_name', 'outcome'], observed=True).size().reset_index(name='count')
+    counts['verdict'] = counts['outcome'].cat.rename_categories(str.title)
 
-def get_verdicts_stacked_bar_chart(data):
+    return counts[['circuit_name', 'verdict', 'count']]
 
-    data['verdict'] = data['verdict'].apply(standardise_verdicts)
 
-    data = data[data['circuit_id'] != 1]
+def get_verdicts_stacked_bar_chart(data: pd.DataFrame) -> alt.Chart:
+    '''Returns a stacked bar chart of verdicts by circuit.
+    Cases are counted before charting, so only one row per bar segment is sent to the browser.'''
 
-    chart = alt.Chart(data).mark_bar().encode(
+    chart = alt.Chart(get_verdict_counts(data)).mark_bar().encode(
         y=alt.Y('circuit_name:N').title('Location'),
-        x=alt.X('count(verdict):Q').title('Number of cases'),
-        color=alt.Color('verdict').title('Verdict'))
+        x=alt.X('count:Q').title('Number of cases'),
+        color=alt.Color('verdict:N').title('Verdict'))
 
-    return chart
+    return check_chart_size(chart, "verdicts by circuit")
 
 
 if __name__ == "__main__":
 
-    load_dotenv()
-
-    CONN = get_db_connection(ENV)
-
-    DATA = get_data_from_db(CONN)
-
-    filtered = get_filtered_data(DATA, {'judge_id': None, 'circuit_id': None,
-                                        'gender': None, 'appointment_date': None,
-                                        'judge_type_id': None})
+    filtered = get_filtered_aggregates(get_data_version(),
+                                       {'judge_id': None, 'circuit_name': None,
+                                        'gender': None, 'appointed': None,
+                                        'type_name': None})
 
     result = get_gender_donut_chart(filtered)
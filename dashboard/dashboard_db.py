@@ -0,0 +1,107 @@
+'''Shared data access for the dashboard pages: a connection pool per server process
+and the data version that cached queries are keyed on.'''
+
+from contextlib import contextmanager
+from os import environ as ENV
+from threading import BoundedSemaphore
+
+import streamlit as st
+from dotenv import load_dotenv
+from psycopg2 import InterfaceError, OperationalError
+from psycopg2.extensions import connection
+from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+
+
+# Seconds between checks of the data version. Cached queries are reused until it changes.
+VERSION_TTL = float(ENV.get("CACHE_VERSION_INTERVAL", 5))
+
+# Cached results kept per query, e.g. for the current and previous data versions
+CACHE_MAX_ENTRIES = 64
+
+
+class BlockingConnectionPool(ThreadedConnectionPool):
+    """A ThreadedConnectionPool that waits for a free connection instead of raising,
+    as in the API. Closed connections are replaced on checkout."""
+
+    def __init__(self, minconn: int, maxconn: int, timeout: float, *args, **kwargs):
+        self.timeout = timeout
+        self._slots = BoundedSemaphore(maxconn)
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key=None) -> connection:
+        """Checks out a connection, waiting up to timeout seconds for one to be free."""
+
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolError("Timed out waiting for a database connection.")
+
+        try:
+            conn = super().getconn(key)
+            if conn.closed:
+                super().putconn(conn, key, close=True)
+                conn = super().getconn(key)
+        except Exception:
+            self._slots.release()
+            raise
+
+        return conn
+
+    def putconn(self, conn: connection, key=None, close: bool = False) -> None:
+        """Returns a connection to the pool and frees its slot."""
+
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self._slots.release()
+
+
+@st.cache_resource(show_spinner=False)
+def get_db_pool() -> BlockingConnectionPool:
+    """Returns the connection pool shared by every page, rerun and session of this process.
+    Connections are opened as sessions need them, up to DB_POOL_SIZE at once.
+    Queries beyond that wait up to DB_POOL_TIMEOUT seconds for a free connection."""
+
+    load_dotenv()
+
+    return BlockingConnectionPool(1, int(ENV.get("DB_POOL_SIZE", 10)),
+                                  float(ENV.get("DB_POOL_TIMEOUT", 5)),
+                                  dbname=ENV["DB_NAME"],
+                                  user=ENV["DB_USER"],
+                                  password=ENV["DB_PASSWORD"],
+                                  host=ENV["DB_HOST"],
+                                  port=ENV["DB_PORT"],
+                                  cursor_factory=RealDictCursor)
+
+
+@contextmanager
+def get_cursor():
+    """Checks out a pooled connection for the length of the block and yields a cursor on it.
+    Connections that fail mid-query are discarded and replaced."""
+
+    pool = get_db_pool()
+    conn = pool.getconn()
+
+    # The dashboard only reads, so there is no transaction left open between checkouts
+    conn.autocommit = True
+
+    broken = False
+    try:
+        with conn.cursor() as cur:
+            yield cur
+    except (OperationalError, InterfaceError):
+        broken = True
+        raise
+    finally:
+        pool.putconn(conn, close=broken)
+
+
+@st.cache_data(ttl=VERSION_TTL, show_spinner=False)
+def get_data_version() -> int:
+    """Returns the data version bumped by the pipelines after each load.
+    Cached query functions take it as an argument, so their results are reused until new data lands."""
+
+    with get_cursor() as cur:
+        cur.execute("SELECT version FROM data_version;")
+        row = cur.fetchone()
+
+    return row["version"] if row else 0
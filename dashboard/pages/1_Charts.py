@@ -1,10 +1,14 @@
-from os import environ as ENV
 import streamlit as st
 from layout import set_page_config, get_sidebar
-from streamlit_app import load_dotenv, get_data_from_db, get_db_connection, get_judge_type_selection, get_circuit_selection, get_gender_selection, get_date_selection, get_judge_selection, compile_inputs_as_dict, get_filtered_data
-from charts import (get_db_connection,
-                    get_data_from_db,
-                    get_filtered_data,
+from dashboard_db import get_data_version
+from selections import (get_judge_type_selection,
+                        get_circuit_selection,
+                        get_gender_selection,
+                        get_date_selection,
+                        get_judge_selection,
+                        compile_inputs_as_dict)
+from snapshot import load_snapshot
+from charts import (get_filtered_aggregates,
                     get_gender_donut_chart,
                     get_waffle_chart,
                     get_waffle_metrics,
@@ -12,37 +16,34 @@ from charts import (get_db_connection,
                     get_verdicts_stacked_bar_chart,
                     get_case_count_line_chart)
 
-load_dotenv()
-CONN = get_db_connection(ENV)
-
 set_page_config()
 
 get_sidebar()
 
 st.title("Court Dashboard")
 
-data = get_data_from_db(CONN)
+data = load_snapshot(get_data_version())
 
 # controls/filters (may need columns to organize the controls)
 controls = st.columns(5)
 with controls[0]:
     viz_type_selection = get_judge_type_selection(
-        CONN, "viz_type_selection")
+        "viz_type_selection")
 with controls[1]:
     viz_circuit_selection = get_circuit_selection(
-        CONN, "viz_circuit_selection")
+        "viz_circuit_selection")
 with controls[2]:
     viz_gender_selection = get_gender_selection(
-        CONN, "viz_gender_selection")
+        "viz_gender_selection")
 with controls[3]:
     viz_date_selection = get_date_selection(
         "viz_date_selection")
 with controls[4]:
     viz_judge_selection = get_judge_selection(
-        CONN, "viz_judge_selectbox", "name")
-inputs = compile_inputs_as_dict(CONN, viz_type_selection, viz_circuit_selection,
+        "viz_judge_selectbox", "name")
+inputs = compile_inputs_as_dict(viz_type_selection, viz_circuit_selection,
                                 viz_gender_selection, viz_date_selection, viz_judge_selection)
-filtered_data = get_filtered_data(data, inputs)
+filtered_data = get_filtered_aggregates(get_data_version(), inputs)
 
 row_1 = st.columns(3, gap="medium")
 with row_1[0]:
@@ -76,8 +77,8 @@ with row_1[2]:
 row_2 = st. columns(2, gap="medium")
 with row_2[0]:
     st.subheader("Case Count / Time")
-    st.altair_chart(get_case_count_line_chart(CONN), use_container_width=True)
+    st.altair_chart(get_case_count_line_chart(), use_container_width=True)
 
 with row_2[1]:
     st.subheader("Judge Count / Time")
-    st.altair_chart(get_judge_count_line_chart(CONN), use_container_width=True)
+    st.altair_chart(get_judge_count_line_chart(), use_container_width=True)
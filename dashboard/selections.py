@@ -0,0 +1,151 @@
+'''Filter widgets shared by the dashboard pages, and the queries behind their options.'''
+
+import streamlit as st
+from streamlit_searchbox import st_searchbox
+
+from dashboard_db import get_cursor, get_data_version, CACHE_MAX_ENTRIES
+
+# Search-as-you-type settings: matches shown, shortest term searched,
+# milliseconds to wait after typing stops, and searches cached
+SEARCH_LIMIT = 10
+MIN_SEARCH_LENGTH = 3
+SEARCH_DEBOUNCE = 300
+SEARCH_CACHE_ENTRIES = 1024
+
+
+def escape_like(term: str) -> str:
+    """Escapes the LIKE wildcards in a search term."""
+
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def get_bootstrap(version: int) -> dict:
+    """Returns the headline metrics and every filter option list in a single query:
+    judge, case and transcript counts, and circuit, gender and judge type options.
+    Cached until the data version changes."""
+
+    with get_cursor() as cur:
+        query = """
+                WITH genders AS (
+                    SELECT DISTINCT gender
+                    FROM judge
+                    WHERE gender IS NOT NULL
+                )
+                SELECT (SELECT COUNT(judge_id) FROM judge) AS judges,
+                    (SELECT COUNT(DISTINCT case_no) FROM transcript) AS cases,
+                    (SELECT COUNT(transcript_id) FROM transcript) AS transcripts,
+                    (SELECT COALESCE(json_agg(name ORDER BY name), '[]') FROM circuit) AS circuits,
+                    (SELECT COALESCE(json_agg(gender ORDER BY gender), '[]') FROM genders) AS genders,
+                    (SELECT COALESCE(json_agg(type_name ORDER BY type_name), '[]') FROM judge_type) AS judge_types
+                """
+        cur.execute(query)
+        bootstrap = dict(cur.fetchone())
+
+    return bootstrap
+
+
+@st.cache_data(max_entries=SEARCH_CACHE_ENTRIES, show_spinner=False)
+def search_judges(version: int, term: str) -> list[tuple[str, int]]:
+    """Returns the top judges whose name contains the search term, as (name, judge_id) options.
+    Names starting with the term come first. Cached per term until the data version changes."""
+
+    term = term.strip()
+    if len(term) < MIN_SEARCH_LENGTH:
+        return []
+
+    with get_cursor() as cur:
+        query = """
+                SELECT judge_id, name
+                FROM judge
+                WHERE name ILIKE %(contains)s
+                ORDER BY name ILIKE %(prefix)s DESC, similarity(name, %(term)s) DESC, name
+                LIMIT %(limit)s
+                """
+        cur.execute(query, {"contains": "%" + escape_like(term) + "%",
+                            "prefix": escape_like(term) + "%",
+                            "term": term,
+                            "limit": SEARCH_LIMIT})
+        rows = cur.fetchall()
+
+    return [(row["name"], row["judge_id"]) for row in rows]
+
+
+def get_judge_selection(key: str, placeholder: str) -> int:
+    """Returns a search-as-you-type box for individual judges.
+    Returns the judge_id of the chosen judge, or None."""
+
+    return st_searchbox(lambda term: search_judges(get_data_version(), term),
+                        key=key,
+                        placeholder=placeholder,
+                        debounce=SEARCH_DEBOUNCE)
+
+
+def get_circuit_selection(key: str) -> st.multiselect:
+    """Returns a Streamlit multiselect for circuits."""
+
+    rows = get_bootstrap(get_data_version())["circuits"]
+
+    judge_selection = st.multiselect(key=key,
+                                     placeholder="circuit(s)",
+                                     options=rows,
+                                     default=None,
+                                     label="judge selection",
+                                     label_visibility="hidden",)
+
+    return judge_selection
+
+
+def get_gender_selection(key: str) -> st.selectbox:
+    """Returns a Streamlit selectbox for genders."""
+
+    rows = get_bootstrap(get_data_version())["genders"]
+
+    judge_selection = st.selectbox(key=key,
+                                   placeholder="gender",
+                                   options=rows,
+                                   index=None,
+                                   label="gender selection",
+                                   label_visibility="hidden")
+
+    return judge_selection
+
+
+def get_date_selection(key: str) -> st.date_input:
+    """Returns a Streamlit date input for judge appointment."""
+
+    return st.date_input(key=key,
+                         value=(),
+                         min_value=None, max_value=None,
+                         format="YYYY/MM/DD",
+                         label="date selection",
+                         label_visibility="hidden")
+
+
+def get_judge_type_selection(key: str) -> st.selectbox:
+    """Returns a Streamlit selectbox for judge types."""
+
+    rows = get_bootstrap(get_data_version())["judge_types"]
+
+    judge_selection = st.selectbox(key=key,
+                                   placeholder="type",
+                                   options=rows,
+                                   index=None,
+                                   label="judge type selection",
+                                   label_visibility="hidden")
+
+    return judge_selection
+
+
+def compile_inputs_as_dict(judge_type: str = None, circuits: list[str] = None,
+                           gender: str = None, date: tuple = None, judge: int = None) -> dict:
+    """Returns input widget returns as a single dictionary of filters.
+    Types and circuits are filtered by name, so no lookups are needed."""
+
+    inputs = {"judge_id": judge,
+              "circuit_name": tuple(circuits) if circuits else None,
+              "gender": gender,
+              "appointed": date,
+              "type_name": judge_type}
+
+    return inputs
@@ -0,0 +1,109 @@
+'''Local columnar snapshot of the joined dashboard dataset.
+The snapshot is an Arrow IPC file, memory-mapped when read and refreshed incrementally
+by appending transcripts newer than the latest one it holds.'''
+
+from os import environ as ENV, path, replace
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import streamlit as st
+
+from dashboard_db import get_cursor
+
+SNAPSHOT_PATH = ENV.get("SNAPSHOT_PATH", "snapshot.arrow")
+
+# Low cardinality text columns are dictionary encoded, and load as pandas categoricals
+SNAPSHOT_SCHEMA = pa.schema([("transcript_id", pa.int32()),
+                             ("case_no", pa.string()),
+                             ("transcript_date", pa.date32()),
+                             ("title", pa.string()),
+                             ("outcome", pa.dictionary(pa.int8(), pa.string())),
+                             ("judge_id", pa.int32()),
+                             ("judge", pa.dictionary(pa.int32(), pa.string())),
+                             ("appointed", pa.date32()),
+                             ("gender", pa.dictionary(pa.int8(), pa.string())),
+                             ("type_id", pa.int16()),
+                             ("type_name", pa.dictionary(pa.int8(), pa.string())),
+                             ("circuit_id", pa.int16()),
+                             ("circuit_name", pa.dictionary(pa.int8(), pa.string()))])
+
+
+def get_rows_after(transcript_id: int) -> pa.Table:
+    """Returns the joined dataset for transcripts after the given id, without summaries."""
+
+    with get_cursor() as cur:
+        query = """
+                SELECT t.transcript_id, t.case_no, t.transcript_date, t.title, t.outcome,
+                    j.judge_id, j.name AS judge, j.appointed, j.gender,
+                    jt.judge_type_id AS type_id, jt.type_name,
+                    c.circuit_id, c.name AS circuit_name
+                FROM transcript AS t
+                JOIN judge AS j
+                    ON t.judge_id = j.judge_id
+                JOIN judge_type AS jt
+                    ON j.judge_type_id = jt.judge_type_id
+                JOIN circuit AS c
+                    ON j.circuit_id = c.circuit_id
+                WHERE t.transcript_id > %s
+                ORDER BY t.transcript_id
+                """
+        cur.execute(query, [transcript_id])
+        rows = cur.fetchall()
+
+    return pa.Table.from_pylist(rows, schema=SNAPSHOT_SCHEMA)
+
+
+def read_snapshot(snapshot_path: str) -> pa.Table:
+    """Returns the snapshot, memory-mapped from disk.
+    Returns an empty table if there is none, or if it was written with a different schema."""
+
+    if not path.exists(snapshot_path):
+        return SNAPSHOT_SCHEMA.empty_table()
+
+    with pa.memory_map(snapshot_path) as source:
+        table = pa.ipc.open_file(source).read_all()
+
+    if not table.schema.equals(SNAPSHOT_SCHEMA):
+        return SNAPSHOT_SCHEMA.empty_table()
+
+    return table
+
+
+def write_snapshot(table: pa.Table, snapshot_path: str) -> None:
+    """Writes the snapshot to a temporary file and moves it into place,
+    so readers never see a partly written file."""
+
+    temp_path = snapshot_path + ".tmp"
+
+    with pa.OSFile(temp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    replace(temp_path, snapshot_path)
+
+
+def refresh_snapshot(snapshot_path: str = SNAPSHOT_PATH) -> pa.Table:
+    """Appends transcripts newer than the snapshot's latest to it, and returns the snapshot.
+    Only new transcripts are fetched, so changes to existing rows need a rebuild
+    (delete the snapshot file)."""
+
+    table = read_snapshot(snapshot_path)
+
+    last_id = pc.max(table["transcript_id"]).as_py() if table.num_rows else 0
+    new_rows = get_rows_after(last_id)
+
+    if new_rows.num_rows:
+        # The IPC file format needs one dictionary per column across every batch
+        table = pa.concat_tables([table, new_rows]).unify_dictionaries().combine_chunks()
+        write_snapshot(table, snapshot_path)
+
+    return table
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_snapshot(version: int) -> pd.DataFrame:
+    """Returns the joined dashboard dataset with categorical judge, circuit, gender and outcome columns.
+    Shared by every session of this process until the data version changes, so it must not be modified."""
+
+    return refresh_snapshot().to_pandas(date_as_object=False)
@@ -0,0 +1,86 @@
+"""This script tests functions in the charts.py file"""
+from unittest.mock import patch, MagicMock
+
+import pandas as pd
+
+from charts import get_yearly_counts, get_judges_appointed, get_cases
+
+"""
+Testing get_yearly_counts
+"""
+
+
+def test_get_yearly_counts_sums_counts_per_year():
+    """Tests that the counts of dates in the same year are added up."""
+
+    data = pd.DataFrame({"transcript_date": ["2020-01-01", "2020-06-01", "2021-03-01"],
+                         "count": [2, 3, 4]})
+
+    counts = get_yearly_counts(data, "transcript_date")
+
+    assert counts["count"].tolist() == [5, 4]
+
+
+def test_get_yearly_counts_uses_years_in_data():
+    """Tests that the years run from the first to the last year in the data,
+    as the first day of each year."""
+
+    data = pd.DataFrame({"transcript_date": ["2015-05-01", "2017-01-01"], "count": [1, 1]})
+
+    counts = get_yearly_counts(data, "transcript_date")
+
+    assert counts["transcript_date"].tolist() == [pd.Timestamp("2015-01-01"),
+                                                  pd.Timestamp("2016-01-01"),
+                                                  pd.Timestamp("2017-01-01")]
+
+
+def test_get_yearly_counts_fills_gaps_for_every_group():
+    """Tests that years a group has no rows in are filled with zero."""
+
+    data = pd.DataFrame({"appointed": ["2000-01-01", "2002-01-01", "2001-01-01"],
+                         "gender": ["F", "F", "M"],
+                         "count": [1, 2, 3]})
+
+    counts = get_yearly_counts(data, "appointed", "gender")
+
+    assert list(zip(counts["gender"], counts["appointed"].dt.year, counts["count"])) == [
+        ("F", 2000, 1), ("F", 2001, 0), ("F", 2002, 2),
+        ("M", 2000, 0), ("M", 2001, 3), ("M", 2002, 0)]
+
+
+def test_get_yearly_counts_ignores_missing_dates():
+    """Tests that rows with no date are left out."""
+
+    data = pd.DataFrame({"transcript_date": ["2020-01-01", None], "count": [1, 5]})
+
+    assert get_yearly_counts(data, "transcript_date")["count"].tolist() == [1]
+
+
+@patch("charts.get_cursor")
+def test_get_yearly_counts_with_no_judges(mock_cursor):
+    """Tests that an empty judge table gives an empty series rather than an error."""
+
+    cur = MagicMock()
+    cur.fetchall.return_value = []
+    mock_cursor.return_value.__enter__.return_value = cur
+    get_judges_appointed.clear()
+
+    counts = get_yearly_counts(get_judges_appointed(0), "appointed", "gender")
+
+    assert counts.empty
+    assert list(counts.columns) == ["gender", "appointed", "count"]
+
+
+@patch("charts.get_cursor")
+def test_get_yearly_counts_with_no_cases(mock_cursor):
+    """Tests that an empty transcript table gives an empty series rather than an error."""
+
+    cur = MagicMock()
+    cur.fetchall.return_value = []
+    mock_cursor.return_value.__enter__.return_value = cur
+    get_cases.clear()
+
+    counts = get_yearly_counts(get_cases(0), "transcript_date")
+
+    assert counts.empty
+    assert list(counts.columns) == ["transcript_date", "count"]
@@ -0,0 +1,99 @@
+"""Records EXPLAIN ANALYZE timings of the hot query paths before and after the index migrations.
+Must be run against an empty scratch database, as it creates the schema and seeds synthetic data."""
+
+from argparse import ArgumentParser
+from os import environ as ENV, path
+import json
+
+from dotenv import load_dotenv
+from psycopg2.extensions import connection
+
+from migrate import get_db_connection, get_applied_versions, migrate
+from seed_synthetic import seed_synthetic_data
+
+
+SEEDS_FILE = path.join(path.dirname(path.abspath(__file__)), "seeds.sql")
+
+# (name, query, params) for the queries run by the API and dashboard
+HOT_QUERIES = [
+    ("cases by judge",
+     "SELECT * FROM transcript WHERE judge_id = %s;", (42,)),
+    ("case by case_no",
+     "SELECT * FROM transcript WHERE case_no = %s;", ("CL-2012-000012",)),
+    ("case title search",
+     "SELECT * FROM transcript WHERE title ILIKE %s;", ("%fizz holdings ltd v 1%",)),
+    ("judges by circuit and type",
+     "SELECT * FROM judge WHERE circuit_id = %s AND judge_type_id = %s;", (2, 6))
+]
+
+
+def explain_analyze(conn: connection, query: str, params: tuple) -> tuple[float, str]:
+    """Returns the execution time in ms and the top plan node of a query."""
+
+    with conn.cursor() as cur:
+        cur.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + query, params)
+        plan = cur.fetchone()[0]
+    conn.rollback()
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    node = plan[0]["Plan"]
+    while node.get("Plans") and node["Node Type"] in ("Gather", "Bitmap Heap Scan"):
+        node = node["Plans"][0]
+
+    return plan[0]["Execution Time"], node["Node Type"]
+
+
+def time_hot_queries(conn: connection, repeats: int) -> dict[str, tuple[float, str]]:
+    """Returns the best execution time and plan node of each hot query."""
+
+    timings = {}
+    for name, query, params in HOT_QUERIES:
+        runs = [explain_analyze(conn, query, params) for _ in range(repeats)]
+        timings[name] = min(runs)
+
+    return timings
+
+
+def main(judges: int, transcripts: int, repeats: int) -> None:
+    """Seeds a scratch database and compares query timings before and after indexing."""
+
+    load_dotenv()
+    conn = get_db_connection(ENV)
+
+    if get_applied_versions(conn):
+        raise RuntimeError("Benchmark must be run against an empty database.")
+
+    migrate(conn, target=1)
+    with open(SEEDS_FILE, encoding="utf-8") as f, conn.cursor() as cur:
+        cur.execute(f.read())
+    conn.commit()
+    seed_synthetic_data(conn, judges, transcripts)
+
+    before = time_hot_queries(conn, repeats)
+
+    migrate(conn)
+    with conn.cursor() as cur:
+        cur.execute("ANALYZE judge, transcript;")
+    conn.commit()
+
+    after = time_hot_queries(conn, repeats)
+
+    print(f"{'query':<28}{'before (ms)':>14}{'after (ms)':>14}  plan")
+    for name, _, _ in HOT_QUERIES:
+        print(f"{name:<28}{before[name][0]:>14.2f}{after[name][0]:>14.2f}"
+              f"  {before[name][1]} -> {after[name][1]}")
+
+    conn.close()
+
+
+if __name__ == "__main__":
+
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--judges", type=int, default=10_000)
+    parser.add_argument("--transcripts", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    main(args.judges, args.transcripts, args.repeats)
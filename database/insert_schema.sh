@@ -1,3 +1,2 @@
 source .env
-export PGPASSWORD=$DB_PASSWORD
-psql --host $DB_HOST -p $DB_PORT -U $DB_USER -d $DB_NAME -f schema.sql
\ No newline at end of file
+python3 migrate.py "$@"
\ No newline at end of file
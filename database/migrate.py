@@ -0,0 +1,112 @@
+"""Applies the versioned SQL migrations in the migrations folder to the database."""
+
+from argparse import ArgumentParser
+from os import environ as ENV, listdir, path
+import logging
+import re
+
+from dotenv import load_dotenv
+from psycopg2 import connect
+from psycopg2.extensions import connection
+
+
+MIGRATIONS_FOLDER = path.join(path.dirname(path.abspath(__file__)), "migrations")
+MIGRATION_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+
+def get_db_connection(config) -> connection:
+    """Returns db connection."""
+
+    return connect(dbname=config["DB_NAME"],
+                   user=config["DB_USER"],
+                   password=config["DB_PASSWORD"],
+                   host=config["DB_HOST"],
+                   port=config["DB_PORT"])
+
+
+def get_migrations(folder: str = MIGRATIONS_FOLDER) -> list[tuple[int, str, str]]:
+    """Returns the (version, name, filepath) of every migration file, ordered by version.
+    Migration files are named like 0001_initial_schema.sql."""
+
+    migrations = []
+    for filename in listdir(folder):
+        match = MIGRATION_PATTERN.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2),
+                               path.join(folder, filename)))
+
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError("Migration versions must be unique.")
+
+    return sorted(migrations)
+
+
+def get_applied_versions(conn: connection) -> set[int]:
+    """Returns the versions already applied, creating the tracking table if needed."""
+
+    with conn.cursor() as cur:
+        cur.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_migrations(
+                        "version" INT PRIMARY KEY,
+                        "name" TEXT NOT NULL,
+                        "applied_at" TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                    );
+                    """)
+        cur.execute("SELECT version FROM schema_migrations;")
+        versions = {row[0] for row in cur.fetchall()}
+    conn.commit()
+
+    return versions
+
+
+def apply_migration(conn: connection, version: int, name: str, filepath: str) -> None:
+    """Runs a single migration and records it, in one transaction."""
+
+    with open(filepath, encoding="utf-8") as f:
+        statements = f.read()
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute(statements)
+            cur.execute("""INSERT INTO schema_migrations (version, name) VALUES (%s, %s);""",
+                        (version, name))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def migrate(conn: connection, target: int = None, folder: str = MIGRATIONS_FOLDER) -> list[int]:
+    """Applies every pending migration up to and including the target version.
+    Returns the versions applied."""
+
+    applied = get_applied_versions(conn)
+
+    newly_applied = []
+    for version, name, filepath in get_migrations(folder):
+        if version in applied or (target is not None and version > target):
+            continue
+        logging.info(f"Applying migration {version:04d}_{name}...")
+        apply_migration(conn, version, name, filepath)
+        newly_applied.append(version)
+
+    return newly_applied
+
+
+if __name__ == "__main__":
+
+    logging.basicConfig(encoding='utf-8', level=logging.INFO)
+
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--target", type=int, default=None,
+                        help="last migration version to apply (default: all)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    CONN = get_db_connection(ENV)
+
+    versions = migrate(CONN, args.target)
+    logging.info(f"Applied {len(versions)} migration(s).")
+
+    CONN.close()
@@ -1,16 +1,14 @@
-DROP TABLE IF EXISTS transcript, judge, judge_type, circuit;
-
-CREATE TABLE judge_type(
+CREATE TABLE IF NOT EXISTS judge_type(
     "judge_type_id" SMALLINT UNIQUE PRIMARY KEY GENERATED ALWAYS AS IDENTITY,
     "type_name" VARCHAR(100) NOT NULL
 );
 
-CREATE TABLE circuit(
+CREATE TABLE IF NOT EXISTS circuit(
     "circuit_id" SMALLINT UNIQUE PRIMARY KEY GENERATED ALWAYS AS IDENTITY,
     "name" VARCHAR(50) NOT NULL
 );
 
-CREATE TABLE judge(
+CREATE TABLE IF NOT EXISTS judge(
     "judge_id" INT UNIQUE PRIMARY KEY GENERATED ALWAYS AS IDENTITY,
     "name" TEXT NOT NULL,
     "appointed" DATE,
@@ -21,7 +19,7 @@ CREATE TABLE judge(
     FOREIGN KEY ("judge_type_id") REFERENCES judge_type("judge_type_id")
 );
 
-CREATE TABLE transcript(
+CREATE TABLE IF NOT EXISTS transcript(
     "transcript_id" INT UNIQUE PRIMARY KEY GENERATED ALWAYS AS IDENTITY,
     "case_no" VARCHAR(17),
     "judge_id" INT NOT NULL,
@@ -30,4 +28,11 @@ CREATE TABLE transcript(
     "title" TEXT NOT NULL,
     "transcript_date" DATE NOT NULL,
     FOREIGN KEY ("judge_id") REFERENCES judge("judge_id")
-);
\ No newline at end of file
+);
+
+CREATE TABLE IF NOT EXISTS scrape_source(
+    "url" TEXT UNIQUE PRIMARY KEY,
+    "etag" TEXT,
+    "last_modified" TEXT,
+    "content_hash" CHAR(64)
+);
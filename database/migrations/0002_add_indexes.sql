@@ -0,0 +1,11 @@
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS transcript_judge_id_idx ON transcript ("judge_id");
+
+CREATE INDEX IF NOT EXISTS transcript_case_no_idx ON transcript ("case_no");
+
+CREATE INDEX IF NOT EXISTS transcript_title_trgm_idx ON transcript USING GIN ("title" gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS judge_circuit_id_idx ON judge ("circuit_id");
+
+CREATE INDEX IF NOT EXISTS judge_judge_type_id_idx ON judge ("judge_type_id");
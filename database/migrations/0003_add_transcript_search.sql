@@ -0,0 +1,9 @@
+ALTER TABLE transcript
+    ADD COLUMN IF NOT EXISTS "search_vector" TSVECTOR
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce("title", '')), 'A') ||
+        setweight(to_tsvector('english', coalesce("summary", '')), 'B') ||
+        setweight(to_tsvector('english', coalesce("verdict", '')), 'C')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS transcript_search_vector_idx ON transcript USING GIN ("search_vector");
@@ -0,0 +1,34 @@
+CREATE MATERIALIZED VIEW IF NOT EXISTS case_count_by_judge AS
+    SELECT j.judge_id, j.name, COUNT(t.transcript_id) AS case_count
+    FROM judge AS j
+    LEFT JOIN transcript AS t
+        ON t.judge_id = j.judge_id
+    GROUP BY j.judge_id, j.name;
+
+CREATE UNIQUE INDEX IF NOT EXISTS case_count_by_judge_idx ON case_count_by_judge ("judge_id");
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS verdict_count_by_circuit AS
+    SELECT c.circuit_id, c.name,
+        COUNT(t.transcript_id) FILTER (WHERE t.verdict ILIKE '%claimant%') AS claimant,
+        COUNT(t.transcript_id) FILTER (WHERE t.verdict NOT ILIKE '%claimant%'
+                                         AND t.verdict ILIKE '%defendant%') AS defendant,
+        COUNT(t.transcript_id) FILTER (WHERE t.verdict NOT ILIKE '%claimant%'
+                                         AND t.verdict NOT ILIKE '%defendant%') AS unknown
+    FROM circuit AS c
+    LEFT JOIN judge AS j
+        ON j.circuit_id = c.circuit_id
+    LEFT JOIN transcript AS t
+        ON t.judge_id = j.judge_id
+    GROUP BY c.circuit_id, c.name;
+
+CREATE UNIQUE INDEX IF NOT EXISTS verdict_count_by_circuit_idx ON verdict_count_by_circuit ("circuit_id");
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS appointment_count_by_year AS
+    SELECT EXTRACT(YEAR FROM appointed)::INT AS year,
+        COALESCE(gender, 'U') AS gender,
+        COUNT(judge_id) AS judge_count
+    FROM judge
+    WHERE appointed IS NOT NULL
+    GROUP BY 1, 2;
+
+CREATE UNIQUE INDEX IF NOT EXISTS appointment_count_by_year_idx ON appointment_count_by_year ("year", "gender");
@@ -0,0 +1,35 @@
+DO $$
+BEGIN
+    CREATE TYPE verdict_outcome AS ENUM ('claimant', 'defendant', 'unknown');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END
+$$;
+
+ALTER TABLE transcript
+    ADD COLUMN IF NOT EXISTS "outcome" verdict_outcome NOT NULL DEFAULT 'unknown';
+
+UPDATE transcript
+SET "outcome" = CASE
+        WHEN "verdict" ILIKE '%claimant%' THEN 'claimant'
+        WHEN "verdict" ILIKE '%defendant%' THEN 'defendant'
+        ELSE 'unknown'
+    END::verdict_outcome;
+
+CREATE INDEX IF NOT EXISTS transcript_outcome_idx ON transcript ("outcome");
+
+DROP MATERIALIZED VIEW IF EXISTS verdict_count_by_circuit;
+
+CREATE MATERIALIZED VIEW verdict_count_by_circuit AS
+    SELECT c.circuit_id, c.name,
+        COUNT(t.transcript_id) FILTER (WHERE t.outcome = 'claimant') AS claimant,
+        COUNT(t.transcript_id) FILTER (WHERE t.outcome = 'defendant') AS defendant,
+        COUNT(t.transcript_id) FILTER (WHERE t.outcome = 'unknown') AS unknown
+    FROM circuit AS c
+    LEFT JOIN judge AS j
+        ON j.circuit_id = c.circuit_id
+    LEFT JOIN transcript AS t
+        ON t.judge_id = j.judge_id
+    GROUP BY c.circuit_id, c.name;
+
+CREATE UNIQUE INDEX IF NOT EXISTS verdict_count_by_circuit_idx ON verdict_count_by_circuit ("circuit_id");
@@ -0,0 +1,60 @@
+CREATE TABLE IF NOT EXISTS stopword(
+    "word" TEXT PRIMARY KEY
+);
+
+-- The stopwords of the wordcloud package, left out of word clouds
+INSERT INTO stopword ("word") VALUES
+    ('a'), ('about'), ('above'), ('after'), ('again'), ('against'), ('all'), ('also'), ('am'),
+    ('an'), ('and'), ('any'), ('are'), ('aren''t'), ('as'), ('at'), ('be'), ('because'), ('been'),
+    ('before'), ('being'), ('below'), ('between'), ('both'), ('but'), ('by'), ('can'), ('can''t'),
+    ('cannot'), ('com'), ('could'), ('couldn''t'), ('did'), ('didn''t'), ('do'), ('does'),
+    ('doesn''t'), ('doing'), ('don''t'), ('down'), ('during'), ('each'), ('else'), ('ever'),
+    ('few'), ('for'), ('from'), ('further'), ('get'), ('had'), ('hadn''t'), ('has'), ('hasn''t'),
+    ('have'), ('haven''t'), ('having'), ('he'), ('he''d'), ('he''ll'), ('he''s'), ('hence'),
+    ('her'), ('here'), ('here''s'), ('hers'), ('herself'), ('him'), ('himself'), ('his'), ('how'),
+    ('how''s'), ('however'), ('http'), ('i'), ('i''d'), ('i''ll'), ('i''m'), ('i''ve'), ('if'),
+    ('in'), ('into'), ('is'), ('isn''t'), ('it'), ('it''s'), ('its'), ('itself'), ('just'), ('k'),
+    ('let''s'), ('like'), ('me'), ('more'), ('most'), ('mustn''t'), ('my'), ('myself'), ('no'),
+    ('nor'), ('not'), ('of'), ('off'), ('on'), ('once'), ('only'), ('or'), ('other'),
+    ('otherwise'), ('ought'), ('our'), ('ours'), ('ourselves'), ('out'), ('over'), ('own'), ('r'),
+    ('same'), ('shall'), ('shan''t'), ('she'), ('she''d'), ('she''ll'), ('she''s'), ('should'),
+    ('shouldn''t'), ('since'), ('so'), ('some'), ('such'), ('than'), ('that'), ('that''s'),
+    ('the'), ('their'), ('theirs'), ('them'), ('themselves'), ('then'), ('there'), ('there''s'),
+    ('therefore'), ('these'), ('they'), ('they''d'), ('they''ll'), ('they''re'), ('they''ve'),
+    ('this'), ('those'), ('through'), ('to'), ('too'), ('under'), ('until'), ('up'), ('very'),
+    ('was'), ('wasn''t'), ('we'), ('we''d'), ('we''ll'), ('we''re'), ('we''ve'), ('were'),
+    ('weren''t'), ('what'), ('what''s'), ('when'), ('when''s'), ('where'), ('where''s'), ('which'),
+    ('while'), ('who'), ('who''s'), ('whom'), ('why'), ('why''s'), ('with'), ('won''t'), ('would'),
+    ('wouldn''t'), ('www'), ('you'), ('you''d'), ('you''ll'), ('you''re'), ('you''ve'), ('your'),
+    ('yours'), ('yourself'), ('yourselves')
+ON CONFLICT DO NOTHING;
+
+CREATE TABLE IF NOT EXISTS transcript_term(
+    "transcript_id" INT NOT NULL,
+    "term" TEXT NOT NULL,
+    "count" INT NOT NULL,
+    PRIMARY KEY ("transcript_id", "term"),
+    FOREIGN KEY ("transcript_id") REFERENCES transcript("transcript_id") ON DELETE CASCADE
+);
+
+-- Counts the terms in the summary of every transcript not yet indexed.
+-- Words are lowercased, a possessive 's is dropped and stopwords are skipped, as in the wordcloud package.
+-- Returns the number of transcripts indexed.
+CREATE OR REPLACE FUNCTION index_transcript_terms() RETURNS INTEGER AS $$
+    WITH inserted AS (
+        INSERT INTO transcript_term ("transcript_id", "term", "count")
+        SELECT t.transcript_id, w.term, COUNT(*)
+        FROM transcript AS t
+        CROSS JOIN LATERAL (
+            SELECT regexp_replace(m[1], '''s$', '') AS term
+            FROM regexp_matches(lower(t.summary), '([a-z][a-z'']+)', 'g') AS m
+        ) AS w
+        WHERE NOT EXISTS (SELECT 1 FROM transcript_term AS tt WHERE tt.transcript_id = t.transcript_id)
+            AND NOT EXISTS (SELECT 1 FROM stopword AS s WHERE s.word = w.term)
+        GROUP BY t.transcript_id, w.term
+        RETURNING "transcript_id"
+    )
+    SELECT COUNT(DISTINCT "transcript_id")::INT FROM inserted;
+$$ LANGUAGE SQL;
+
+SELECT index_transcript_terms();
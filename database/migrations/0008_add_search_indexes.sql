@@ -0,0 +1,5 @@
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS judge_name_trgm_idx ON judge USING GIN ("name" gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS transcript_case_no_prefix_idx ON transcript ("case_no" varchar_pattern_ops);
@@ -0,0 +1,19 @@
+CREATE UNIQUE INDEX IF NOT EXISTS judge_type_name_idx ON judge_type ("type_name");
+
+INSERT INTO judge_type
+    ("type_name")
+VALUES
+    ('N/A'),
+    ('Supreme Court Judge'),
+    ('High Court King’s Bench Division'),
+    ('High Court Family Division'),
+    ('High Court Chancery Division'),
+    ('Circuit Judge'),
+    ('District Judge'),
+    ('District Judge (Magistrate'' Court)'),
+    ('Diversity and Community Relations Judge'),
+    ('Bench Chair'),
+    ('Judge Advocates General'),
+    ('Retired Senior Judiciary under 75'),
+    ('Recorder')
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,91 @@
+"""Seeds the database with a large synthetic dataset of judges and transcripts for benchmarking.
+Requires the initial schema migration and seeds.sql to have been applied first.
+Later migrations may be applied before or after seeding."""
+
+from argparse import ArgumentParser
+from os import environ as ENV
+import logging
+
+from dotenv import load_dotenv
+from psycopg2.extensions import connection
+
+from migrate import get_db_connection
+
+
+# Classifies the verdicts of the seeded transcripts, as migration 0006 does for existing rows
+OUTCOME_BACKFILL = """
+                   UPDATE transcript
+                   SET "outcome" = CASE
+                           WHEN "verdict" ILIKE '%claimant%' THEN 'claimant'
+                           WHEN "verdict" ILIKE '%defendant%' THEN 'defendant'
+                           ELSE 'unknown'
+                       END::verdict_outcome
+                   WHERE "outcome" = 'unknown';
+                   """
+
+
+def has_outcome_column(conn: connection) -> bool:
+    """Returns whether migration 0006, which adds transcript outcomes, has been applied."""
+
+    with conn.cursor() as cur:
+        cur.execute("""SELECT EXISTS (SELECT 1 FROM information_schema.columns
+                                      WHERE table_name = 'transcript' AND column_name = 'outcome');""")
+        return cur.fetchone()[0]
+
+
+def seed_synthetic_data(conn: connection, judges: int, transcripts: int) -> None:
+    """Inserts the given number of synthetic judges and transcripts.
+    Outcomes are classified here if the outcome column exists, otherwise by migration 0006."""
+
+    classify_outcomes = has_outcome_column(conn)
+
+    with conn.cursor() as cur:
+        cur.execute("""
+                    INSERT INTO judge
+                        (name, appointed, circuit_id, judge_type_id, gender)
+                    SELECT 'Synthetic Judge ' || i,
+                        DATE '1990-01-01' + (random() * 12000)::INT,
+                        1 + floor(random() * (SELECT COUNT(*) FROM circuit))::INT,
+                        1 + floor(random() * (SELECT COUNT(*) FROM judge_type))::INT,
+                        (ARRAY['M', 'F', 'X'])[1 + floor(random() * 3)::INT]
+                    FROM generate_series(1, %s) AS i;
+                    """, (judges,))
+
+        cur.execute("""
+                    INSERT INTO transcript
+                        (case_no, judge_id, verdict, summary, title, transcript_date)
+                    SELECT 'CL-' || (2000 + i %% 25) || '-' || lpad(i::TEXT, 6, '0'),
+                        (SELECT min(judge_id) FROM judge) + floor(random() * (SELECT COUNT(*) FROM judge))::INT,
+                        (ARRAY['Claimant', 'Defendant'])[1 + floor(random() * 2)::INT],
+                        'The claimant brought proceedings against the defendant regarding contract '
+                            || md5(i::TEXT) || '. The court considered the evidence and submissions.',
+                        (ARRAY['Foo', 'Bar', 'Fizz', 'Buzz'])[1 + i %% 4] || ' Holdings Ltd v '
+                            || md5((i * 7)::TEXT) || ' Plc',
+                        DATE '2000-01-01' + (random() * 9000)::INT
+                    FROM generate_series(1, %s) AS i;
+                    """, (transcripts,))
+
+        if classify_outcomes:
+            cur.execute(OUTCOME_BACKFILL)
+
+        cur.execute("ANALYZE judge, transcript;")
+    conn.commit()
+
+
+if __name__ == "__main__":
+
+    logging.basicConfig(encoding='utf-8', level=logging.INFO)
+
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--judges", type=int, default=10_000)
+    parser.add_argument("--transcripts", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    load_dotenv()
+    CONN = get_db_connection(ENV)
+
+    logging.info(
+        f"Seeding {args.judges} judges and {args.transcripts} transcripts...")
+    seed_synthetic_data(CONN, args.judges, args.transcripts)
+
+    CONN.close()
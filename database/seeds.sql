@@ -12,8 +12,9 @@ VALUES
     ('Diversity and Community Relations Judge'),
     ('Bench Chair'),
     ('Judge Advocates General'),
-    ('Retired Senior Judiciary under 75')
-;
+    ('Retired Senior Judiciary under 75'),
+    ('Recorder')
+ON CONFLICT DO NOTHING;
 
 INSERT INTO circuit
     ("name")
@@ -0,0 +1,43 @@
+"""This script tests functions in the migrate.py file"""
+import pytest
+
+from migrate import get_migrations, MIGRATIONS_FOLDER
+
+
+def test_get_migrations_orders_by_version(tmp_path):
+    """Tests that migrations are ordered by their numeric version."""
+
+    for filename in ["0010_foo.sql", "0002_bar.sql", "0001_fizz.sql"]:
+        (tmp_path / filename).write_text("SELECT 1;")
+
+    versions = [version for version, _, _ in get_migrations(tmp_path)]
+
+    assert versions == [1, 2, 10]
+
+
+def test_get_migrations_ignores_other_files(tmp_path):
+    """Tests that only files named like a migration are returned."""
+
+    (tmp_path / "0001_foo.sql").write_text("SELECT 1;")
+    (tmp_path / "README.md").write_text("foo")
+    (tmp_path / "bar.sql").write_text("SELECT 1;")
+
+    assert [name for _, name, _ in get_migrations(tmp_path)] == ["foo"]
+
+
+def test_get_migrations_rejects_duplicate_versions(tmp_path):
+    """Tests that two migrations with the same version raise an error."""
+
+    (tmp_path / "0001_foo.sql").write_text("SELECT 1;")
+    (tmp_path / "0001_bar.sql").write_text("SELECT 1;")
+
+    with pytest.raises(ValueError):
+        get_migrations(tmp_path)
+
+
+def test_repo_migrations_start_at_one_without_gaps():
+    """Tests that the shipped migrations are numbered 1, 2, 3..."""
+
+    versions = [version for version, _, _ in get_migrations(MIGRATIONS_FOLDER)]
+
+    assert versions == list(range(1, len(versions) + 1))
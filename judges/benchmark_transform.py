@@ -0,0 +1,68 @@
+"""Benchmarks the vectorised transform_df against the previous row-wise apply implementation."""
+
+from argparse import ArgumentParser
+from timeit import timeit
+
+import pandas as pd
+
+from pipeline import convert_date, extract_name_gender, transform_df
+
+
+JUDGES = ["His Honour Judge Foo", "Her Honour Judge Bar (Sitting in Retirement)",
+          "Their Honour Judge Foobar", "His Honour Judge Fizz Buzz"]
+DATES = ["12-03-2024", "12-03-24", "12-Mar-24", "29-Sep-09"]
+
+
+def get_judges(rows: int) -> pd.DataFrame:
+    """Returns a synthetic judge list with the given number of rows."""
+
+    return pd.DataFrame({"judge": [JUDGES[i % len(JUDGES)] for i in range(rows)],
+                         "appointment": [DATES[i % len(DATES)] for i in range(rows)]})
+
+
+def row_wise_transform_df(df: pd.DataFrame, title: str, type: str,
+                          circuit: str = "N/A") -> pd.DataFrame:
+    """The previous transform_df, applying convert_date and extract_name_gender per row."""
+
+    df["appointment"] = df["appointment"].apply(convert_date)
+
+    df["judge"] = df["judge"].apply(extract_name_gender, args=(title,))
+    df["name"] = df["judge"].str[0]
+    df["gender"] = df["judge"].str[1]
+
+    df["type"] = type
+
+    if "circuit" not in df.columns:
+        df["circuit"] = circuit
+
+    return df[["name", "gender", "appointment", "type", "circuit"]]
+
+
+def main(rows: int, repeats: int) -> None:
+    """Times both implementations and checks they give the same output."""
+
+    judges = get_judges(rows)
+
+    expected = row_wise_transform_df(judges.copy(), "Honour Judge", "Circuit Judge")
+    result = transform_df(judges.copy(), "Honour Judge", "Circuit Judge")
+    assert expected.astype(object).equals(result.astype(object))
+
+    row_wise = timeit(lambda: row_wise_transform_df(
+        judges.copy(), "Honour Judge", "Circuit Judge"), number=repeats) / repeats
+    vectorised = timeit(lambda: transform_df(
+        judges.copy(), "Honour Judge", "Circuit Judge"), number=repeats) / repeats
+
+    print(f"rows: {rows}")
+    print(f"row-wise:   {row_wise * 1000:.1f} ms")
+    print(f"vectorised: {vectorised * 1000:.1f} ms")
+    print(f"speed-up:   {row_wise / vectorised:.1f}x")
+
+
+if __name__ == "__main__":
+
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    main(args.rows, args.repeats)
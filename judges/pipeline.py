@@ -5,7 +5,11 @@ from rapidfuzz.fuzz import partial_ratio
 from psycopg2.extras import RealDictCursor
 from psycopg2 import connect, sql
 from os import environ as ENV
+from hashlib import sha256
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import logging
+import re
 from datetime import datetime
 from dotenv import load_dotenv
 import requests
@@ -16,60 +20,171 @@ import pandas as pd
 # ========== GLOBALS ==========
 KINGS_BENCH_URL = "https://www.judiciary.uk/about-the-judiciary/who-are-the-judiciary/senior-judiciary-list/kings-bench-division-judges/"
 CIRCUIT_URL = "https://www.judiciary.uk/about-the-judiciary/who-are-the-judiciary/list-of-members-of-the-judiciary/circuit-judge-list/"
+CHANCERY_URL = "https://www.judiciary.uk/about-the-judiciary/who-are-the-judiciary/senior-judiciary-list/chancery-division-judges/"
+FAMILY_URL = "https://www.judiciary.uk/about-the-judiciary/who-are-the-judiciary/senior-judiciary-list/family-division-judges/"
+DISTRICT_URL = "https://www.judiciary.uk/about-the-judiciary/who-are-the-judiciary/list-of-members-of-the-judiciary/district-judge-list/"
+RECORDER_URL = "https://www.judiciary.uk/about-the-judiciary/who-are-the-judiciary/list-of-members-of-the-judiciary/recorder-list/"
+
+# Each source lists its table columns in page order,
+# the honorific preceding judge names and the judge type stored in the db.
+SOURCES = [
+    {"name": "HCKB",
+     "url": KINGS_BENCH_URL,
+     "columns": ["judge", "appointment"],
+     "title": "Justice",
+     "type": "High Court King’s Bench Division"},
+    {"name": "CJ",
+     "url": CIRCUIT_URL,
+     "columns": ["judge", "circuit", "appointment"],
+     "title": "Honour Judge",
+     "type": "Circuit Judge"},
+    {"name": "HCCD",
+     "url": CHANCERY_URL,
+     "columns": ["judge", "appointment"],
+     "title": "Justice",
+     "type": "High Court Chancery Division"},
+    {"name": "HCFD",
+     "url": FAMILY_URL,
+     "columns": ["judge", "appointment"],
+     "title": "Justice",
+     "type": "High Court Family Division"},
+    {"name": "DJ",
+     "url": DISTRICT_URL,
+     "columns": ["judge", "circuit", "appointment"],
+     "title": "District Judge",
+     "type": "District Judge"},
+    {"name": "REC",
+     "url": RECORDER_URL,
+     "columns": ["judge", "circuit", "appointment"],
+     "title": "Recorder",
+     "type": "Recorder"}
+]
+
+# Materialized views of aggregate statistics, refreshed after each load
+STATS_VIEWS = ["case_count_by_judge", "verdict_count_by_circuit", "appointment_count_by_year"]
+
+PREFIX_GENDERS = {"Her": "F", "Mrs": "F", "Ms": "F", "Miss": "F",
+                  "His": "M", "Mr": "M",
+                  "Their": "X"}
+
+# Stored state of a source that has not been fetched successfully yet
+EMPTY_STATE = {"etag": None, "last_modified": None, "content_hash": None}
+
+# Appointment date formats keyed by the length of the date string
+DATE_FORMATS = {10: "%d-%m-%Y",
+                8: "%d-%m-%y",
+                9: "%d-%b-%y"}
 
 
 # ========== FUNCTIONS: SCRAPING ==========
-def scrape_kings_bench(url: str) -> pd.DataFrame:
-    """Get data from a list of judges with a URL"""
+def fetch_if_changed(url: str, state: dict) -> tuple[bytes, dict]:
+    """Sends a conditional request for a page using the stored state of the source.
+    Returns the page content and the new state, or None as content
+    if the page has not changed since the last run, or could not be fetched.
+    The state always has every field, even if the source has never been fetched."""
 
-    try:
-        response = requests.get(url, timeout=10)
+    state = {**EMPTY_STATE, **state}
 
-        soup = BeautifulSoup(response.content, 'html.parser')
+    headers = {}
+    if state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
 
-        cells = soup.find_all(
-            "td", class_="govuk-table__cell")
-        cells = [cell.text
-                 for cell in cells
-                 if "<strong>" not in str(cell)]
+    try:
+        response = requests.get(url, headers=headers, timeout=10)
 
-        rows = []
-        for c in range(0, len(cells), 2):
-            rows.append({"judge": cells[c],
-                         "appointment": cells[c+1]})
+        if response.status_code == 304:
+            return None, state
 
-        return pd.DataFrame(rows)
+        response.raise_for_status()
 
     except requests.RequestException as error:
-        logging.info(f"Error fetching URL: {error}")
-        return pd.DataFrame([])
+        logging.warning(f"Error fetching URL: {error}")
+        return None, state
+
+    new_state = {"etag": response.headers.get("ETag"),
+                 "last_modified": response.headers.get("Last-Modified"),
+                 "content_hash": sha256(response.content).hexdigest()}
+
+    if new_state["content_hash"] == state.get("content_hash"):
+        return None, new_state
+
+    return response.content, new_state
+
+
+def parse_judge_list(content: bytes, columns: list[str]) -> pd.DataFrame:
+    """Get data from the html of a list of judges.
+    Table cells are grouped into rows using the given column layout."""
+
+    soup = BeautifulSoup(content, 'html.parser')
+
+    cells = soup.find_all(
+        "td", class_="govuk-table__cell")
+    cells = [cell.text
+             for cell in cells
+             if not cell.find("strong")]
 
+    width = len(columns)
+    rows = []
+    for c in range(0, len(cells) - width + 1, width):
+        rows.append(dict(zip(columns, cells[c:c+width])))
 
-def scrape_circuit_judges(url: str) -> pd.DataFrame:
-    """Get data from a list of judges with a URL"""
+    return pd.DataFrame(rows, columns=columns)
+
+
+def check_judge_list(judges: pd.DataFrame, source: dict) -> None:
+    """Raises a ValueError if a judge list does not fit the source's column layout,
+    i.e. it has no rows, or none of its appointment dates could be read."""
+
+    if judges.empty:
+        raise ValueError(f"No judges found on {source['url']}.")
+
+    if judges["appointment"].isna().all():
+        raise ValueError(f"No appointment dates found on {source['url']}, "
+                         f"expected columns {source['columns']}.")
+
+
+def scrape_source(source: dict, state: dict) -> tuple[pd.DataFrame, dict]:
+    """Fetches, parses and transforms a single judge list.
+    Returns None as data if the list has not changed since the last run.
+    Errors are logged and return None with the previous state,
+    so the list is retried on the next run while the other lists still load."""
+
+    previous = {**EMPTY_STATE, **state}
 
     try:
-        response = requests.get(url, timeout=10)
+        content, state = fetch_if_changed(source["url"], previous)
 
-        soup = BeautifulSoup(response.content, 'html.parser')
+        if not content:
+            logging.info(f"===== {source['name']} unchanged, skipping... =====")
+            return None, state
 
-        cells = soup.find_all(
-            "td", class_="govuk-table__cell")
-        cells = [cell.text
-                 for cell in cells
-                 if "strong" not in str(cell)]
+        logging.info(f"===== transforming {source['name']}... =====")
+        judges = parse_judge_list(content, source["columns"])
+        judges = transform_df(judges, source["title"], source["type"])
+        check_judge_list(judges, source)
 
-        rows = []
-        for c in range(0, len(cells), 3):
-            rows.append({"judge": cells[c],
-                         "circuit": cells[c+1],
-                         "appointment": cells[c+2]})
+    except Exception as error:
+        logging.error(f"===== {source['name']} failed, skipping: {error} =====")
+        return None, previous
 
-        return pd.DataFrame(rows)
+    return judges, state
 
-    except requests.RequestException as error:
-        logging.info(f"Error fetching URL: {error}")
-        return pd.DataFrame([])
+
+def scrape_sources(sources: list[dict], states: dict[str, dict]) -> tuple[list[pd.DataFrame], dict]:
+    """Scrapes all judge lists concurrently.
+    Returns the changed lists and the new state of every source."""
+
+    with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+        results = list(executor.map(
+            lambda source: scrape_source(source, states.get(source["url"], {})),
+            sources))
+
+    new_states = {source["url"]: state
+                  for source, (_, state) in zip(sources, results)}
+
+    return [judges for judges, _ in results if judges is not None], new_states
 
 
 # ========== FUNCTIONS: TRANSFORMING ==========
@@ -92,22 +207,17 @@ def extract_name_gender(judge: str, title: str) -> str:
     """Strips away any prefix and suffix.
     Returns a name."""
 
+    prefix, name = "", judge
     if title in judge:
-        prefix, name = [part.strip() for part in judge.split(f" {title} ")]
+        prefix, _, name = judge.partition(title)
     else:
         for token in title.split():
             if token in judge:
-                prefix, name = judge.split(f" {token} ")
+                prefix, _, name = judge.partition(token)
                 break
+    prefix = prefix.strip()
 
-    if prefix in ["Her", "Mrs", "Ms", "Miss"]:
-        gender = "F"
-    elif prefix in ["His", "Mr"]:
-        gender = "M"
-    elif prefix in ["Their"]:
-        gender = "X"
-    else:
-        gender = None
+    gender = PREFIX_GENDERS.get(prefix)
 
     if "(" not in name:
         return name.strip(), gender
@@ -117,6 +227,54 @@ def extract_name_gender(judge: str, title: str) -> str:
     return name.strip(), gender
 
 
+def convert_dates(dates: pd.Series) -> pd.Series:
+    """Vectorised convert_date.
+    Returns dates as strings, or None for unrecognised or invalid dates,
+    which are logged (convert_date raises on invalid dates)."""
+
+    # A column with no dates at all is read as floats, which have no .str accessor
+    dates = dates.astype(object).str.split().str[0]
+    lengths = dates.str.len()
+
+    converted = pd.Series(None, index=dates.index, dtype=object)
+    for length, date_format in DATE_FORMATS.items():
+        mask = lengths == length
+        if mask.any():
+            parsed = pd.to_datetime(dates[mask], format=date_format,
+                                    errors="coerce")
+            converted[mask] = parsed.dt.strftime("%Y-%m-%d")
+
+    unread = dates[dates.notna() & converted.isna()]
+    if not unread.empty:
+        logging.warning(f"Could not read {len(unread)} appointment date(s), "
+                        f"storing them as NULL: {unread.tolist()}")
+
+    return converted.where(converted.notna(), None)
+
+
+@lru_cache
+def get_judge_pattern(title: str) -> re.Pattern:
+    """Returns a compiled pattern that splits a judge into
+    prefix, name and parenthetical suffix around the given title (or any word of it)."""
+
+    titles = "|".join(re.escape(part) for part in [title, *title.split()])
+
+    return re.compile(r"^\s*(?:(?P<prefix>.*?)\s*(?:" + titles + r"))?"
+                      r"\s*(?P<name>[^(]*?)\s*(?P<suffix>\(.*)?$", re.DOTALL)
+
+
+def extract_names_genders(judges: pd.Series, title: str) -> pd.DataFrame:
+    """Vectorised extract_name_gender.
+    Returns a pd.DF with name and gender columns."""
+
+    parts = judges.str.extract(get_judge_pattern(title))
+
+    genders = parts["prefix"].map(PREFIX_GENDERS).astype(object)
+
+    return pd.DataFrame({"name": parts["name"],
+                         "gender": genders.where(genders.notna(), None)})
+
+
 def transform_df(df: pd.DataFrame,
                  title: str,
                  type: str,
@@ -124,11 +282,9 @@ def transform_df(df: pd.DataFrame,
     """Cleans and enriches the data.
     Returns transformed data as pd.DF."""
 
-    df["appointment"] = df["appointment"].apply(convert_date)
+    df["appointment"] = convert_dates(df["appointment"])
 
-    df["judge"] = df["judge"].apply(extract_name_gender, args=(title,))
-    df["name"] = df["judge"].str[0]
-    df["gender"] = df["judge"].str[1]
+    df[["name", "gender"]] = extract_names_genders(df["judge"], title)
 
     df["type"] = type
 
@@ -202,6 +358,12 @@ def fill_ids(judges: pd.DataFrame,
     judges = judges.join(circuits.set_index("name"), "circuit", "left"
                          ).drop(columns="circuit")
 
+    unknown = judges["judge_type_id"].isna() | judges["circuit_id"].isna()
+    if unknown.any():
+        logging.warning("Skipping %s judges with a type or circuit missing from the db: %s",
+                        unknown.sum(), ", ".join(judges.loc[unknown, "name"]))
+        judges = judges[~unknown].astype({"judge_type_id": int, "circuit_id": int})
+
     columns = list(zip(judges['name'], judges['gender'], judges['appointment'],
                        judges['judge_type_id'], judges['circuit_id']))
 
@@ -215,6 +377,58 @@ def fill_ids(judges: pd.DataFrame,
     return [new_judge for new_judge in columns if new_judge not in already_stored]
 
 
+def get_source_states(conn: connect) -> dict[str, dict]:
+    """Returns the stored ETag, Last-Modified and content hash of each scraped source."""
+
+    with conn.cursor() as cur:
+        cur.execute("""SELECT url, etag, last_modified, content_hash FROM scrape_source;""")
+        rows = cur.fetchall()
+
+    return {row["url"]: {"etag": row["etag"],
+                         "last_modified": row["last_modified"],
+                         "content_hash": row["content_hash"]}
+            for row in rows}
+
+
+def save_source_states(conn: connect, states: dict[str, dict]) -> None:
+    """Stores the ETag, Last-Modified and content hash of each scraped source."""
+
+    with conn.cursor() as cur:
+        query = """
+                INSERT INTO scrape_source
+                    (url, etag, last_modified, content_hash)
+                VALUES
+                    (%s, %s, %s, %s)
+                ON CONFLICT (url) DO UPDATE
+                SET etag = EXCLUDED.etag,
+                    last_modified = EXCLUDED.last_modified,
+                    content_hash = EXCLUDED.content_hash
+                """
+        cur.executemany(query, [(url, state["etag"], state["last_modified"], state["content_hash"])
+                                for url, state in states.items()])
+    conn.commit()
+
+
+def bump_data_version(conn: connect) -> None:
+    """Increments the data version read by the API and dashboard caches.
+    Called once per load, when the statistics views are refreshed."""
+
+    with conn.cursor() as cur:
+        cur.execute("""UPDATE data_version SET version = version + 1, updated_at = NOW();""")
+
+
+def refresh_stats_views(conn: connect) -> None:
+    """Refreshes the aggregate statistics views without blocking readers,
+    then bumps the data version so cached data and statistics are rebuilt."""
+
+    with conn.cursor() as cur:
+        for view in STATS_VIEWS:
+            cur.execute(sql.SQL("REFRESH MATERIALIZED VIEW CONCURRENTLY {};").format(
+                sql.Identifier(view)))
+    bump_data_version(conn)
+    conn.commit()
+
+
 def upload_data(conn: connect, records: list[tuple]) -> None:
     """Insert judge data into judge table in db."""
 
@@ -239,28 +453,18 @@ def main():
     load_dotenv()
     conn = get_db_connection(ENV)
 
-    logger.info("=========== SCRAPING ==========")
-
-    logger.info("===== scraping HCKB... =====")
-
-    kings_bench = scrape_kings_bench(KINGS_BENCH_URL)
-
-    logger.info("===== scraping CJ... =====")
-    circuit_judges = scrape_circuit_judges(CIRCUIT_URL)
+    logger.info("=========== SCRAPING & TRANSFORMING ==========")
+    states = get_source_states(conn)
+    transformed, states = scrape_sources(SOURCES, states)
 
-    logger.info("=========== TRANSFORMING ==========")
-
-    logger.info("===== transforming HCKB... =====")
-
-    kings_bench = transform_df(
-        kings_bench, "Justice", "High Court King’s Bench Division")
-
-    logger.info("===== transforming CJ... =====")
-    circuit_judges = transform_df(
-        circuit_judges, "Honour Judge", "Circuit Judge")
+    if not transformed:
+        logger.info("===== no sources changed... =====")
+        save_source_states(conn, states)
+        conn.close()
+        return
 
     logger.info("===== concatenating DFs... =====")
-    judges = concat_dfs([kings_bench, circuit_judges])
+    judges = concat_dfs(transformed)
 
     logger.info("=========== LOADING ==========")
     judge_types = get_db_table(conn, "judge_type")
@@ -271,9 +475,14 @@ def main():
     if judges:
         logger.info("===== uploading to database... =====")
         upload_data(conn, judges)
+        logger.info("===== refreshing statistics... =====")
+        refresh_stats_views(conn)
     else:
         logger.info("===== no new judges... =====")
 
+    save_source_states(conn, states)
+    conn.close()
+
 
 def handler(event, context):
     """Pass the main function to a handler to be run by Lambda on AWS"""
@@ -1,9 +1,16 @@
 """This script tests functions in the pipeline.py file"""
+from hashlib import sha256
+from unittest.mock import patch, MagicMock
+
 import pytest
 
 import pandas as pd
 
-from pipeline import convert_date, extract_name_gender, transform_df, concat_dfs, fuzzy_match_circuit
+import requests
+
+from pipeline import (convert_date, extract_name_gender, transform_df, concat_dfs, fuzzy_match_circuit,
+                      fetch_if_changed, parse_judge_list, scrape_sources, convert_dates, extract_names_genders,
+                      save_source_states, scrape_source, check_judge_list, fill_ids, EMPTY_STATE)
 
 """
 Testing convert_date
@@ -43,7 +50,9 @@ Testing extracting_name_gender
                                                                           ("Mrs Justice Buzz",
                                                                            "Justice", "Buzz", "F"),
                                                                           ("Miss Justice Fizzbuzz",
-                                                                           "Justice", "Fizzbuzz", "F")
+                                                                           "Justice", "Fizzbuzz", "F"),
+                                                                          ("District Judge Foo",
+                                                                           "District Judge", "Foo", None)
                                                                           ])
 def test_extracting_name_gender_returns_correct_name_and_gender(judge, title, expected_name, expected_gender):
     """Tests the correct name and gender are returned."""
@@ -109,6 +118,83 @@ def test_transform_df_contains_correct_columns(name, date, title):
     assert all(col in columns for col in tdf.columns.values)
 
 
+"""
+Testing convert_dates and extract_names_genders against convert_date and extract_name_gender
+"""
+
+GOLDEN_DATES = ["12-03-2024", "12-03-24", "12-Mar-24", "07-May-23",
+                "29-Sep-09", "01-01-99 (acting)", "31-12-2000", "foo"]
+
+GOLDEN_JUDGES = [("His Honour Judge Foo", "Honour Judge"),
+                 ("Her Honour Judge Bar (Sitting in Retirement)", "Honour Judge"),
+                 ("Their Honour Judge Foobar", "Honour Judge"),
+                 ("  Her Honour Judge Fizz Buzz  ", "Honour Judge"),
+                 ("Mr Justice Fizz", "Justice"),
+                 ("Mrs Justice Buzz", "Justice"),
+                 ("Ms Justice Bar (Vice-President)", "Justice"),
+                 ("Miss Justice Fizzbuzz", "Justice"),
+                 ("His Honour Foo", "Honour Judge"),
+                 ("District Judge Foo", "District Judge"),
+                 ("District Judge Foo", "Honour Judge"),
+                 ("Recorder Bar", "Recorder"),
+                 ("Mr Foo Bar", "Recorder")]
+
+
+def test_convert_dates_matches_convert_date():
+    """Tests that the vectorised dates equal the row-wise dates."""
+
+    dates = pd.Series(GOLDEN_DATES[:-1])
+
+    assert convert_dates(dates).tolist() == [convert_date(date)
+                                             for date in dates]
+
+
+def test_convert_dates_returns_none_for_unknown_format():
+    """Tests that unrecognised dates become None."""
+
+    assert convert_dates(pd.Series(["foo", "99-99-2024"])).tolist() == [None, None]
+
+
+def test_convert_dates_reads_blank_column():
+    """Tests that a column with no dates, read as floats, becomes None rather than raising."""
+
+    assert convert_dates(pd.Series([float("nan"), float("nan")])).tolist() == [None, None]
+
+
+def test_convert_dates_logs_unread_dates(caplog):
+    """Tests that dates stored as None are logged."""
+
+    convert_dates(pd.Series(["12-03-2024", "99-99-2024"]))
+
+    assert "99-99-2024" in caplog.text
+    assert "12-03-2024" not in caplog.text
+
+
+@pytest.mark.parametrize("judge, title", GOLDEN_JUDGES)
+def test_extract_names_genders_matches_extract_name_gender(judge, title):
+    """Tests that the vectorised names and genders equal the row-wise ones."""
+
+    extracted = extract_names_genders(pd.Series([judge]), title)
+
+    assert tuple(extracted.iloc[0]) == extract_name_gender(judge, title)
+
+
+@pytest.mark.parametrize("title", ["Honour Judge", "Justice"])
+def test_transform_df_matches_row_wise_transform(title):
+    """Tests that transform_df gives the same output as applying the row-wise functions."""
+
+    judges = [judge for judge, judge_title in GOLDEN_JUDGES
+              if judge_title == title]
+    dates = GOLDEN_DATES[:len(judges)]
+    df = pd.DataFrame({"judge": judges, "appointment": dates})
+
+    expected = [(*extract_name_gender(judge, title), convert_date(date))
+                for judge, date in zip(judges, dates)]
+    tdf = transform_df(df, title, "Circuit Judge")
+
+    assert list(zip(tdf["name"], tdf["gender"], tdf["appointment"])) == expected
+
+
 """
 Testing concat_df
 """
@@ -160,3 +246,222 @@ def test_fuzzy_match_circuit_returns_correct_match(test_string, expected_match):
                         "name": "fizz"}, {"name": "buzz"}])
 
     assert fuzzy_match_circuit(test_string, test) == expected_match
+
+
+"""
+Testing fetch_if_changed
+"""
+
+
+def fake_response(status_code: int, content: bytes = b"", headers: dict = None) -> MagicMock:
+    """Returns a mock requests response."""
+
+    response = MagicMock()
+    response.status_code = status_code
+    response.content = content
+    response.headers = headers or {}
+    return response
+
+
+@patch("pipeline.requests.get")
+def test_fetch_if_changed_sends_conditional_headers(mock_get):
+    """Tests that the stored ETag and Last-Modified are sent with the request."""
+
+    mock_get.return_value = fake_response(304)
+    state = {"etag": '"foo"', "last_modified": "bar", "content_hash": "fizz"}
+    fetch_if_changed("url", state)
+
+    headers = mock_get.call_args.kwargs["headers"]
+    assert headers == {"If-None-Match": '"foo"', "If-Modified-Since": "bar"}
+
+
+@patch("pipeline.requests.get")
+def test_fetch_if_changed_returns_none_on_not_modified(mock_get):
+    """Tests that no content is returned and the state is kept on a 304."""
+
+    mock_get.return_value = fake_response(304)
+    state = {"etag": '"foo"', "last_modified": None, "content_hash": "fizz"}
+    content, new_state = fetch_if_changed("url", state)
+
+    assert content is None
+    assert new_state == state
+
+
+@patch("pipeline.requests.get")
+def test_fetch_if_changed_returns_none_on_same_hash(mock_get):
+    """Tests that no content is returned when the page hash has not changed."""
+
+    mock_get.return_value = fake_response(200, b"foobar", {"ETag": '"new"'})
+    state = {"etag": '"old"', "last_modified": None,
+             "content_hash": sha256(b"foobar").hexdigest()}
+    content, new_state = fetch_if_changed("url", state)
+
+    assert content is None
+    assert new_state["etag"] == '"new"'
+
+
+@patch("pipeline.requests.get")
+def test_fetch_if_changed_returns_content_on_change(mock_get):
+    """Tests that the content and new state are returned when the page has changed."""
+
+    mock_get.return_value = fake_response(
+        200, b"foobar", {"ETag": '"new"', "Last-Modified": "today"})
+    content, new_state = fetch_if_changed("url", {})
+
+    assert content == b"foobar"
+    assert new_state == {"etag": '"new"', "last_modified": "today",
+                         "content_hash": sha256(b"foobar").hexdigest()}
+
+
+@patch("pipeline.requests.get")
+def test_fetch_if_changed_returns_empty_state_on_first_run_error(mock_get):
+    """Tests that a failed request for a source with no stored state returns a complete state."""
+
+    mock_get.side_effect = requests.ConnectionError("foo")
+    content, new_state = fetch_if_changed("url", {})
+
+    assert content is None
+    assert new_state == EMPTY_STATE
+
+
+@patch("pipeline.requests.get")
+def test_save_source_states_after_first_run_error(mock_get):
+    """Tests that the state of a source that failed on its first run can be saved."""
+
+    mock_get.side_effect = requests.ConnectionError("foo")
+    _, state = fetch_if_changed("url", {})
+
+    conn = MagicMock()
+    save_source_states(conn, {"url": state})
+
+    cur = conn.cursor.return_value.__enter__.return_value
+    assert cur.executemany.call_args.args[1] == [("url", None, None, None)]
+
+
+"""
+Testing parse_judge_list
+"""
+
+
+def test_parse_judge_list_groups_cells_by_columns():
+    """Tests that cells are paired into rows using the column layout."""
+
+    html_string = """
+            <table>
+                <tr><td class="govuk-table__cell"><strong>Name</strong></td></tr>
+                <tr><td class="govuk-table__cell">His Honour Judge Foo</td>
+                    <td class="govuk-table__cell">London</td>
+                    <td class="govuk-table__cell">12-03-2024</td></tr>
+                <tr><td class="govuk-table__cell">Her Honour Judge Armstrong</td>
+                    <td class="govuk-table__cell">Wales</td>
+                    <td class="govuk-table__cell">12-Mar-24</td></tr>
+            </table>
+        """
+    df = parse_judge_list(html_string.encode(),
+                          ["judge", "circuit", "appointment"])
+
+    assert len(df) == 2
+    assert df.iloc[1].to_dict() == {"judge": "Her Honour Judge Armstrong",
+                                    "circuit": "Wales",
+                                    "appointment": "12-Mar-24"}
+
+
+def test_parse_judge_list_returns_columns_for_empty_page():
+    """Tests that an empty page still returns the expected columns."""
+
+    df = parse_judge_list(b"<html></html>", ["judge", "appointment"])
+
+    assert df.empty
+    assert list(df.columns) == ["judge", "appointment"]
+
+
+"""
+Testing scrape_sources
+"""
+
+
+@patch("pipeline.fetch_if_changed")
+def test_scrape_sources_skips_unchanged_sources(mock_fetch):
+    """Tests that only changed sources are transformed, while every state is returned."""
+
+    page = b"""<td class="govuk-table__cell">Mr Justice Foo</td>
+               <td class="govuk-table__cell">12-03-2024</td>"""
+    mock_fetch.side_effect = lambda url, state: (
+        (page, {"content_hash": "new"}) if url == "changed" else (None, state))
+    sources = [{"name": "foo", "url": "changed", "columns": ["judge", "appointment"],
+                "title": "Justice", "type": "bar"},
+               {"name": "fizz", "url": "unchanged", "columns": ["judge", "appointment"],
+                "title": "Justice", "type": "buzz"}]
+
+    judges, states = scrape_sources(sources, {"unchanged": {"content_hash": "old"}})
+
+    assert len(judges) == 1
+    assert judges[0].iloc[0]["name"] == "Foo"
+    assert states == {"changed": {"content_hash": "new"},
+                      "unchanged": {**EMPTY_STATE, "content_hash": "old"}}
+
+
+@patch("pipeline.fetch_if_changed")
+def test_scrape_sources_skips_failed_sources(mock_fetch):
+    """Tests that a source that fails to parse keeps its previous state,
+    while the other sources still load."""
+
+    page = b"""<td class="govuk-table__cell">Mr Justice Foo</td>
+               <td class="govuk-table__cell">12-03-2024</td>"""
+    mock_fetch.return_value = (page, {"etag": None, "last_modified": None,
+                                      "content_hash": "new"})
+    sources = [{"name": "foo", "url": "ok", "columns": ["judge", "appointment"],
+                "title": "Justice", "type": "bar"},
+               {"name": "fizz", "url": "wrong layout", "columns": ["judge", "circuit", "appointment"],
+                "title": "Justice", "type": "buzz"}]
+
+    judges, states = scrape_sources(sources, {})
+
+    assert len(judges) == 1
+    assert states["ok"]["content_hash"] == "new"
+    assert states["wrong layout"] == EMPTY_STATE
+
+
+@patch("pipeline.fetch_if_changed")
+def test_scrape_source_keeps_previous_state_on_error(mock_fetch):
+    """Tests that an unexpected error keeps the stored state of the source."""
+
+    mock_fetch.side_effect = KeyError("foo")
+    state = {"etag": '"old"', "last_modified": None, "content_hash": "old"}
+
+    judges, new_state = scrape_source({"name": "foo", "url": "url", "columns": ["judge", "appointment"],
+                                       "title": "Justice", "type": "bar"}, state)
+
+    assert judges is None
+    assert new_state == state
+
+
+def test_check_judge_list_raises_for_unreadable_dates():
+    """Tests that a list whose appointment dates could not be read is rejected."""
+
+    judges = pd.DataFrame({"name": ["Foo"], "appointment": [None]})
+
+    with pytest.raises(ValueError):
+        check_judge_list(judges, {"url": "url", "columns": ["judge", "appointment"]})
+
+
+"""
+Testing fill_ids
+"""
+
+
+def test_fill_ids_skips_judges_with_unknown_types(caplog):
+    """Tests that judges whose type is not in the db are logged and dropped, not sent as NaN."""
+
+    judges = pd.DataFrame({"name": ["Foo", "Bar"], "gender": ["M", "F"],
+                           "appointment": ["2024-03-12", "2023-05-07"],
+                           "type": ["Circuit Judge", "Recorder"], "circuit": ["London", "Wales"]})
+    types = pd.DataFrame({"type_name": ["Circuit Judge"], "judge_type_id": [6]})
+    circuits = pd.DataFrame({"name": ["N/A", "London", "Wales"], "circuit_id": [1, 2, 10]})
+    stored_judges = pd.DataFrame({"name": [], "appointed": []})
+
+    records = fill_ids(judges, types, circuits, stored_judges)
+
+    assert records == [("Foo", "M", "2024-03-12", 6, 2)]
+    assert isinstance(records[0][3], int)
+    assert "Bar" in caplog.text
@@ -11,19 +11,8 @@ import requests
 from bs4 import BeautifulSoup
 import pandas as pd
 from pypdf import PdfReader
-from psycopg2 import connect
-from psycopg2.extras import RealDictCursor
 
-
-def get_db_connection() -> connect:
-    """Returns db connection."""
-
-    return connect(dbname=ENV["DB_NAME"],
-                   user=ENV["DB_USER"],
-                   password=ENV["DB_PASSWORD"],
-                   host=ENV["DB_HOST"],
-                   port=ENV["DB_PORT"],
-                   cursor_factory=RealDictCursor)
+from pipeline_db import db_connection
 
 
 def get_stored_titles(conn) -> list:
@@ -189,14 +178,10 @@ def create_dataframe(court_cases: list[dict]) -> pd.DataFrame:
     return cases
 
 
-def extract_cases(end_page: int, start_page: int = 1, ) -> pd.DataFrame:
-    """Given a range of pages (default from 1 - end_page), 
+def extract_cases(conn, end_page: int, start_page: int = 1, ) -> pd.DataFrame:
+    """Given a database connection and a range of pages (default from 1 - end_page), 
     will return a DataFrame of all the cases from these pages."""
 
-    load_dotenv()
-
-    conn = get_db_connection()
-
     stored_titles = get_stored_titles(conn)
 
     extracted_cases = []
@@ -238,7 +223,10 @@ def extract_cases(end_page: int, start_page: int = 1, ) -> pd.DataFrame:
 
 if __name__ == "__main__":
 
-    df = extract_cases(30, 15)
+    load_dotenv()
+
+    with db_connection(ENV) as conn:
+        df = extract_cases(conn, 30, 15)
     if not df.empty:
         print(df[["judge_name", "title", "case_no", "date"]])
     else:
@@ -4,26 +4,15 @@ from os import environ as ENV
 import logging
 import pandas as pd
 from dotenv import load_dotenv
-from psycopg2 import connect
-from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import connection
 
 
 from transform import transform_and_apply_gpt
 from extract import extract_cases
+from pipeline_db import db_connection, index_transcript_terms, refresh_stats_views
 
 
-def get_db_connection() -> connect:
-    """Returns db connection."""
-
-    return connect(dbname=ENV["DB_NAME"],
-                   user=ENV["DB_USER"],
-                   password=ENV["DB_PASSWORD"],
-                   host=ENV["DB_HOST"],
-                   port=ENV["DB_PORT"],
-                   cursor_factory=RealDictCursor)
-
-
-def get_judge_id(judge_name: str, conn: connect) -> int:
+def get_judge_id(judge_name: str, conn: connection) -> int:
     """Matches the judge name using a LIKE pattern to the names on the courts database"""
 
     try:
@@ -55,24 +44,22 @@ def upload_case_data(conn, cases_df):
     with conn.cursor() as cur:
         query = """
                 INSERT INTO transcript
-                    (case_no, title, judge_id, verdict, summary, transcript_date)
+                    (case_no, title, judge_id, verdict, outcome, summary, transcript_date)
                 VALUES
-                    (%s, %s, %s, %s, %s, %s)
+                    (%s, %s, %s, %s, %s, %s, %s)
                 """
         data = list(zip(cases_df['case_no'], cases_df['title'], cases_df['judge_id'],
-                    cases_df['verdict'], cases_df['summary'], cases_df['date']))
+                    cases_df['verdict'], cases_df['outcome'], cases_df['summary'],
+                    cases_df['date']))
 
         cur.executemany(query, data)
+    index_transcript_terms(conn)
     conn.commit()
 
 
-def load_to_database(cases_df: pd.DataFrame) -> None:
+def load_to_database(conn: connection, cases_df: pd.DataFrame) -> None:
     """Run all functions to load relevant information to courts database"""
 
-    load_dotenv()
-
-    conn = get_db_connection()
-
     cases_df['judge_id'] = cases_df['judge_name'].apply(
         get_judge_id, args=(conn,))
 
@@ -80,15 +67,20 @@ def load_to_database(cases_df: pd.DataFrame) -> None:
 
     logging.info("Uploaded case and hearing date data successfully.")
 
-    conn.close()
+    refresh_stats_views(conn)
+
+    logging.info("Refreshed statistics views.")
 
 
 if __name__ == "__main__":
 
-    cases = extract_cases(1)
+    load_dotenv()
+
+    with db_connection(ENV) as conn:
+        cases = extract_cases(conn, 1)
 
-    if not cases.empty:
+        if not cases.empty:
 
-        transformed_cases = transform_and_apply_gpt(cases)
+            transformed_cases = transform_and_apply_gpt(cases)
 
-        load_to_database(transformed_cases)
+            load_to_database(conn, transformed_cases)
@@ -1,6 +1,11 @@
 """Python script that extracts, transforms and loads
 case-relevant information to a relational database service on AWS"""
 
+from os import environ as ENV
+
+from dotenv import load_dotenv
+
+from pipeline_db import db_connection
 from extract import extract_cases
 from transform import transform_and_apply_gpt
 from load import load_to_database
@@ -11,14 +16,18 @@ def main():
     Web scrapes government case website
     Clean, process and pass data to openai API
     Upload case data to RDS
+    One pooled connection is used for the whole run
     """
 
-    cases = extract_cases(1)
+    load_dotenv()
+
+    with db_connection(ENV) as conn:
+        cases = extract_cases(conn, 1)
 
-    if not cases.empty:
-        transformed_cases = transform_and_apply_gpt(cases)
+        if not cases.empty:
+            transformed_cases = transform_and_apply_gpt(cases)
 
-        load_to_database(transformed_cases)
+            load_to_database(conn, transformed_cases)
 
 
 def handler(event, context):
@@ -0,0 +1,129 @@
+"""Shared database connection pool for the extract, transform and load scripts."""
+
+from contextlib import contextmanager
+import logging
+
+from psycopg2 import OperationalError, InterfaceError, sql
+from psycopg2.extensions import connection
+from psycopg2.extras import RealDictCursor
+from psycopg2.pool import SimpleConnectionPool
+
+
+# Materialized views of aggregate statistics, refreshed after each load
+STATS_VIEWS = ["case_count_by_judge", "verdict_count_by_circuit", "appointment_count_by_year"]
+
+# Created on first use and kept for the lifetime of the process,
+# so warm Lambda invocations reuse the open connection.
+POOL = None
+
+
+def get_db_pool(config) -> SimpleConnectionPool:
+    """Returns the module-level connection pool, creating it if needed."""
+
+    global POOL
+
+    if POOL is None or POOL.closed:
+        POOL = SimpleConnectionPool(1, int(config.get("DB_POOL_SIZE", 1)),
+                                    dbname=config["DB_NAME"],
+                                    user=config["DB_USER"],
+                                    password=config["DB_PASSWORD"],
+                                    host=config["DB_HOST"],
+                                    port=config["DB_PORT"],
+                                    cursor_factory=RealDictCursor)
+
+    return POOL
+
+
+def is_healthy(conn: connection) -> bool:
+    """Returns whether a pooled connection is still usable."""
+
+    if conn.closed:
+        return False
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1;")
+        conn.rollback()
+        return True
+    except (OperationalError, InterfaceError):
+        return False
+
+
+def get_db_connection(config) -> connection:
+    """Checks out a healthy connection from the pool.
+    Stale connections (e.g. closed by RDS between invocations) are replaced."""
+
+    pool = get_db_pool(config)
+    conn = pool.getconn()
+
+    if not is_healthy(conn):
+        logging.info("Replacing stale database connection.")
+        pool.putconn(conn, close=True)
+        conn = pool.getconn()
+
+    return conn
+
+
+def release_db_connection(conn: connection) -> None:
+    """Returns a connection to the pool, discarding any uncommitted work."""
+
+    if POOL is None or POOL.closed:
+        conn.close()
+        return
+
+    if not conn.closed:
+        conn.rollback()
+
+    POOL.putconn(conn, close=bool(conn.closed))
+
+
+def close_db_pool() -> None:
+    """Closes every connection in the pool."""
+
+    global POOL
+
+    if POOL is not None and not POOL.closed:
+        POOL.closeall()
+
+    POOL = None
+
+
+def bump_data_version(conn: connection) -> None:
+    """Increments the data version read by the API and dashboard caches.
+    Called once per load, when the statistics views are refreshed."""
+
+    with conn.cursor() as cur:
+        cur.execute("""UPDATE data_version SET version = version + 1, updated_at = NOW();""")
+
+
+def index_transcript_terms(conn: connection) -> int:
+    """Counts the summary terms of newly loaded transcripts for the dashboard word clouds.
+    Call within the loading transaction. Returns the number of transcripts indexed."""
+
+    with conn.cursor() as cur:
+        cur.execute("""SELECT index_transcript_terms() AS indexed;""")
+        return cur.fetchone()["indexed"]
+
+
+def refresh_stats_views(conn: connection) -> None:
+    """Refreshes the aggregate statistics views without blocking readers,
+    then bumps the data version so cached data and statistics are rebuilt."""
+
+    with conn.cursor() as cur:
+        for view in STATS_VIEWS:
+            cur.execute(sql.SQL("REFRESH MATERIALIZED VIEW CONCURRENTLY {};").format(
+                sql.Identifier(view)))
+    bump_data_version(conn)
+    conn.commit()
+
+
+@contextmanager
+def db_connection(config):
+    """Context manager that checks out one connection for a pipeline run."""
+
+    conn = get_db_connection(config)
+
+    try:
+        yield conn
+    finally:
+        release_db_connection(conn)
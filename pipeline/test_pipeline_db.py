@@ -0,0 +1,171 @@
+"""This script tests functions in the pipeline_db.py file"""
+from unittest.mock import patch, MagicMock
+
+import pytest
+from psycopg2 import OperationalError
+
+import pipeline_db
+from pipeline_db import (get_db_pool, get_db_connection, release_db_connection, close_db_pool, db_connection,
+                         bump_data_version, index_transcript_terms, refresh_stats_views)
+
+
+CONFIG = {"DB_NAME": "foo", "DB_USER": "bar", "DB_PASSWORD": "fizz",
+          "DB_HOST": "buzz", "DB_PORT": "5432"}
+
+
+@pytest.fixture(autouse=True)
+def reset_pool():
+    """Makes sure every test starts without a pool."""
+
+    pipeline_db.POOL = None
+    yield
+    pipeline_db.POOL = None
+
+
+def fake_connection(healthy: bool = True) -> MagicMock:
+    """Returns a mock psycopg2 connection."""
+
+    conn = MagicMock()
+    conn.closed = 0
+    if not healthy:
+        conn.cursor.return_value.__enter__.return_value.execute.side_effect = OperationalError
+    return conn
+
+
+"""
+Testing get_db_pool
+"""
+
+
+@patch("pipeline_db.SimpleConnectionPool")
+def test_get_db_pool_is_created_once(mock_pool):
+    """Tests that the pool is reused between calls, as on a warm Lambda."""
+
+    mock_pool.return_value.closed = False
+
+    assert get_db_pool(CONFIG) is get_db_pool(CONFIG)
+    assert mock_pool.call_count == 1
+
+
+@patch("pipeline_db.SimpleConnectionPool")
+def test_get_db_pool_is_recreated_after_close(mock_pool):
+    """Tests that a closed pool is replaced."""
+
+    mock_pool.return_value.closed = False
+    get_db_pool(CONFIG)
+    close_db_pool()
+    get_db_pool(CONFIG)
+
+    assert mock_pool.call_count == 2
+
+
+"""
+Testing get_db_connection
+"""
+
+
+@patch("pipeline_db.SimpleConnectionPool")
+def test_get_db_connection_returns_healthy_connection(mock_pool):
+    """Tests that a healthy connection is checked out as is."""
+
+    conn = fake_connection()
+    mock_pool.return_value.closed = False
+    mock_pool.return_value.getconn.return_value = conn
+
+    assert get_db_connection(CONFIG) is conn
+    mock_pool.return_value.putconn.assert_not_called()
+
+
+@patch("pipeline_db.SimpleConnectionPool")
+def test_get_db_connection_replaces_stale_connection(mock_pool):
+    """Tests that a connection failing the health check is discarded and replaced."""
+
+    stale, fresh = fake_connection(healthy=False), fake_connection()
+    mock_pool.return_value.closed = False
+    mock_pool.return_value.getconn.side_effect = [stale, fresh]
+
+    assert get_db_connection(CONFIG) is fresh
+    mock_pool.return_value.putconn.assert_called_once_with(stale, close=True)
+
+
+"""
+Testing release_db_connection and db_connection
+"""
+
+
+@patch("pipeline_db.SimpleConnectionPool")
+def test_release_db_connection_rolls_back_and_returns_to_pool(mock_pool):
+    """Tests that uncommitted work is discarded before the connection is returned."""
+
+    conn = fake_connection()
+    mock_pool.return_value.closed = False
+    get_db_pool(CONFIG)
+    release_db_connection(conn)
+
+    conn.rollback.assert_called_once()
+    mock_pool.return_value.putconn.assert_called_once_with(conn, close=False)
+
+
+@patch("pipeline_db.SimpleConnectionPool")
+def test_db_connection_releases_on_error(mock_pool):
+    """Tests that the connection is returned to the pool even if the run fails."""
+
+    conn = fake_connection()
+    mock_pool.return_value.closed = False
+    mock_pool.return_value.getconn.return_value = conn
+
+    with pytest.raises(ValueError):
+        with db_connection(CONFIG):
+            raise ValueError
+
+    mock_pool.return_value.putconn.assert_called_once_with(conn, close=False)
+
+
+"""
+Testing bump_data_version
+"""
+
+
+def test_bump_data_version_increments_version():
+    """Tests that the data version counter is incremented."""
+
+    conn = fake_connection()
+    bump_data_version(conn)
+
+    query = conn.cursor.return_value.__enter__.return_value.execute.call_args[0][0]
+    assert "version = version + 1" in query
+    conn.commit.assert_not_called()
+
+
+"""
+Testing index_transcript_terms
+"""
+
+
+def test_index_transcript_terms_returns_count_without_committing():
+    """Tests that new transcripts are indexed within the loading transaction."""
+
+    conn = fake_connection()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchone.return_value = {"indexed": 3}
+
+    assert index_transcript_terms(conn) == 3
+    assert "index_transcript_terms()" in cur.execute.call_args[0][0]
+    conn.commit.assert_not_called()
+
+
+"""
+Testing refresh_stats_views
+"""
+
+
+def test_refresh_stats_views_refreshes_every_view_and_commits():
+    """Tests that each statistics view is refreshed before committing."""
+
+    conn = fake_connection()
+    refresh_stats_views(conn)
+
+    cur = conn.cursor.return_value.__enter__.return_value
+    refreshed = [call[0][0] for call in cur.execute.call_args_list[:-1]]
+    assert len(refreshed) == len(pipeline_db.STATS_VIEWS)
+    conn.commit.assert_called_once()
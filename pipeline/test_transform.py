@@ -1,7 +1,9 @@
 '''This script tests functions in the transform.py file.'''
 
+import pandas as pd
 import pytest
-from transform import is_correct_date_format, format_date, clean_date, strip_titles, standardize_case_no
+from transform import (is_correct_date_format, format_date, clean_date, strip_titles, standardize_case_no,
+                       classify_verdicts)
 
 
 def test_is_correct_date_format_returns_bool():
@@ -80,3 +82,20 @@ def test_strip_titles(input_name, stripped_name):
 def test_standardize_case_no(input_case_no, case_no):
     '''Tests for standardize_case_no function.'''
     assert standardize_case_no(input_case_no) == case_no
+
+
+@pytest.mark.parametrize("verdict, outcome", [("Claimant", "claimant"),
+                                              ("defendant.", "defendant"),
+                                              ("In favour of the CLAIMANT", "claimant"),
+                                              ("Claimant and defendant", "claimant"),
+                                              ("Dismissed", "unknown"),
+                                              (None, "unknown")])
+def test_classify_verdicts(verdict, outcome):
+    '''Tests for classify_verdicts function.'''
+    assert classify_verdicts(pd.Series([verdict])).tolist() == [outcome]
+
+
+def test_classify_verdicts_keeps_index():
+    '''Tests that classified verdicts line up with the original rows.'''
+    verdicts = pd.Series(["Claimant", "Defendant"], index=[5, 3])
+    assert classify_verdicts(verdicts).to_dict() == {5: "claimant", 3: "defendant"}
@@ -2,11 +2,13 @@
 from os import environ as ENV
 
 import re
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 from openai import OpenAI
 
 from extract import extract_cases
+from pipeline_db import db_connection
 
 
 def is_correct_date_format(date: str) -> bool:
@@ -134,6 +136,18 @@ def get_case_verdict(conclusion: str, text_generator: OpenAI) -> str:
     return response.choices[0].message.content
 
 
+def classify_verdicts(verdicts: pd.Series) -> pd.Series:
+    """Classifies free text verdicts as claimant, defendant or unknown, in one pass.
+    A verdict mentioning both parties counts as in favour of the claimant."""
+
+    lowered = verdicts.fillna("").str.lower()
+
+    return pd.Series(np.select([lowered.str.contains("claimant", regex=False),
+                                lowered.str.contains("defendant", regex=False)],
+                               ["claimant", "defendant"], default="unknown"),
+                     index=verdicts.index)
+
+
 def get_case_summary(introduction: str, text_generator: OpenAI) -> str:
     """Extract brief case summaries from introductions"""
 
@@ -162,6 +176,8 @@ def transform_and_apply_gpt(cases: pd.DataFrame):
     cases['verdict'] = cases['conclusion'].apply(
         get_case_verdict, args=(AI,))
 
+    cases['outcome'] = classify_verdicts(cases['verdict'])
+
     cases['summary'] = cases['introduction'].apply(
         get_case_summary, args=(AI,))
 
@@ -179,7 +195,10 @@ def transform_and_apply_gpt(cases: pd.DataFrame):
 
 if __name__ == "__main__":
 
-    cases = extract_cases(1)
+    load_dotenv()
+
+    with db_connection(ENV) as conn:
+        cases = extract_cases(conn, 1)
 
     if not cases.empty:
 